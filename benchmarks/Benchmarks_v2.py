@@ -0,0 +1,379 @@
+# Crypto Price Tracker v2 - Benchmarks
+#
+# Drives the API client, the formatters, the CLI flows and the dashboard render
+# paths against the local CoinGecko emulator, so runs are repeatable offline:
+#
+#     python3 benchmarks/Benchmarks_v2.py --sizes 10,100,1000,5000 --output before.json
+#     python3 benchmarks/Benchmarks_v2.py --output after.json --compare before.json
+#
+# Every result records wall time, upstream API calls, time spent waiting on the
+# rate limiter, retry backoff, bytes received and peak Python memory (the
+# emulator runs in-process, so its response encoding is part of that peak).
+
+import argparse
+import builtins
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'dashboard'))
+
+import Crypto_Prices_v2 as v2
+from CoinGecko_Emulator import CoinGeckoEmulator
+
+SEARCH_NAMES = ["btc", "Ethereum", "sol", "doge", "not-a-real-coin"]
+
+class NullOutput(io.TextIOBase):
+    """stdout sink, so printing is measured without the terminal (or a growing buffer)"""
+    def write(self, text):
+        return len(text)
+
+@contextlib.contextmanager
+def scripted_input(answers: List[str]):
+    """Feed canned answers to input(); 'm' (back to menu) once the script runs out"""
+    answers = iter(answers)
+    original = builtins.input
+    builtins.input = lambda prompt="": next(answers, "m")
+    try:
+        yield
+    finally:
+        builtins.input = original
+
+class BenchmarkRunner:
+    def __init__(self, emulator: CoinGeckoEmulator, repeat: int = 3, calls_per_minute: int = 50,
+                 memory: bool = True):
+        self.emulator = emulator
+        self.repeat = repeat
+        self.calls_per_minute = calls_per_minute
+        self.memory = memory
+        self.results = []
+        self.api = None
+        self.workdir = tempfile.mkdtemp(prefix="crypto-bench-")
+        # CLI trackers read the shared price snapshot; keep it off the user's price_snapshot.db
+        v2.use_snapshot(":memory:")
+
+    def fresh_api(self) -> v2.CoinGeckoAPI:
+        """A cold client (empty caches, full rate budget) installed as the process-wide one"""
+        if v2.shared_async_api is not None:
+            v2.shared_async_api.close()
+        if self.api is not None:
+            self.api.session.close()
+        api = v2.CoinGeckoAPI(base_url=self.emulator.base_url,
+                              rate_limiter=v2.RateLimiter(self.calls_per_minute),
+                              cache=v2.ResponseCache(), disk_cache=v2.DiskCache(":memory:"),
+                              circuit_breaker=v2.CircuitBreaker(), single_flight=v2.SingleFlight())
+        # CLI flows and the dashboard build their trackers on the shared client
+        v2.shared_api = api
+        v2.shared_async_api = v2.AsyncCoinGeckoAPI(api)
+        self.api = api
+        return api
+
+    def fresh_uncached_api(self) -> v2.CoinGeckoAPI:
+        """fresh_api without response caching, like the client --watch and --poll use"""
+        api = self.fresh_api()
+        api.cache = v2.ResponseCache(ttls=dict.fromkeys(v2.ResponseCache.DEFAULT_TTLS, 0), default_ttl=0)
+        return api
+
+    def _run_once(self, setup: Optional[Callable[[], Any]], func: Callable[[Any], Any],
+                  trace_memory: bool) -> Dict[str, Any]:
+        state = setup() if setup else None
+        api = self.api
+        self.emulator.reset_stats()
+        wait_before = api.rate_limiter.total_wait if api else 0.0
+        backoff_before = api.retry_stats()["backoff_seconds"] if api else 0.0
+        gc.collect()
+        if trace_memory:
+            tracemalloc.start()
+        with contextlib.redirect_stdout(NullOutput()):
+            start = time.perf_counter()
+            func(state)
+            wall = time.perf_counter() - start
+        peak = 0
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        emulator_stats = self.emulator.stats()
+        return {
+            "wall_seconds": wall,
+            "api_calls": emulator_stats["total_requests"],
+            "rate_limit_wait_seconds": (api.rate_limiter.total_wait - wait_before) if api else 0.0,
+            "backoff_seconds": (api.retry_stats()["backoff_seconds"] - backoff_before) if api else 0.0,
+            "bytes_received": emulator_stats["bytes_sent"],
+            "peak_memory_bytes": peak,
+        }
+
+    def bench(self, group: str, name: str, coins: int, func: Callable[[Any], Any],
+              setup: Optional[Callable[[], Any]] = None) -> None:
+        """Time `func(setup())` `repeat` times, then once more under tracemalloc for peak memory"""
+        runs = [self._run_once(setup, func, trace_memory=False) for _ in range(self.repeat)]
+        walls = [run["wall_seconds"] for run in runs]
+        result = {
+            "group": group,
+            "name": name,
+            "coins": coins,
+            "wall_seconds": statistics.median(walls),
+            "wall_seconds_min": min(walls),
+            "api_calls": runs[-1]["api_calls"],
+            "rate_limit_wait_seconds": statistics.median(run["rate_limit_wait_seconds"] for run in runs),
+            "backoff_seconds": statistics.median(run["backoff_seconds"] for run in runs),
+            "bytes_received": runs[-1]["bytes_received"],
+            "peak_memory_bytes": None,
+        }
+        if self.memory:
+            # tracemalloc slows allocation-heavy code, so it gets its own run
+            result["peak_memory_bytes"] = self._run_once(setup, func, trace_memory=True)["peak_memory_bytes"]
+        self.results.append(result)
+        print(format_result(result), file=sys.stderr)
+
+    # --- scenarios -----------------------------------------------------------
+
+    def coin_ids(self, count: int) -> List[str]:
+        return [coin["id"] for coin in self.emulator.coins[:count]]
+
+    def quotes(self, count: int) -> Dict[str, v2.CoinQuote]:
+        return {coin["id"]: v2.CoinQuote.from_price(coin["id"], {"usd": coin["current_price"],
+                                                                 "usd_24h_change": coin["price_change_percentage_24h"],
+                                                                 "usd_market_cap": coin["market_cap"]})
+                for coin in self.emulator.coins[:count]}
+
+    def market_quotes(self, count: int) -> List[v2.CoinQuote]:
+        return [v2.CoinQuote.from_market(coin) for coin in self.emulator.coins[:count]]
+
+    def warm_index(self) -> None:
+        """Build the emulator's coin index up front, so lookups never trigger a rebuild mid-run"""
+        index = v2.coin_index_for(self.fresh_api())
+        if index.is_stale():
+            index.build(self.api)
+
+    def run_api(self, sizes: List[int]) -> None:
+        for size in sizes:
+            ids = self.coin_ids(size)
+            self.bench("api", "get_multiple_coin_prices", size,
+                       lambda api: api.get_multiple_coin_prices(ids), self.fresh_api)
+            self.bench("api", "get_price_quotes", size,
+                       lambda api: api.get_price_quotes(ids), self.fresh_api)
+            self.bench("api", "get_top_coins", size,
+                       lambda api: api.get_top_coins(size), self.fresh_api)
+            self.bench("api", "iter_top_quotes", size,
+                       lambda api: sum(1 for _ in api.iter_top_quotes(size)), self.fresh_api)
+            self.bench("api", "iter_top_quotes_stream", size,
+                       lambda api: sum(1 for _ in api.iter_top_quotes(size, stream=True)), self.fresh_api)
+            self.bench("api", "get_price_quotes_cached", size,
+                       lambda api: api.get_price_quotes(ids),
+                       lambda: self._primed(lambda api: api.get_price_quotes(ids)))
+        self.bench("api", "search_coin_x5", len(SEARCH_NAMES),
+                   lambda api: [api.search_coin(name) for name in SEARCH_NAMES], self.fresh_api)
+        self.bench("api", "search_coins_async_x5", len(SEARCH_NAMES),
+                   lambda api: v2.run_sync(v2.AsyncCoinGeckoAPI(api).search_coins(SEARCH_NAMES)),
+                   self.fresh_api)
+        self.bench("api", "get_coins_list", len(self.emulator.coins),
+                   lambda api: api.get_coins_list(), self.fresh_api)
+        self.bench("api", "coin_index_build", len(self.emulator.coins),
+                   lambda api: v2.CoinIndex(index_file=None).build(api), self.fresh_api)
+
+    def _primed(self, call: Callable[[v2.CoinGeckoAPI], Any]) -> v2.CoinGeckoAPI:
+        api = self.fresh_api()
+        call(api)
+        return api
+
+    def run_format(self, sizes: List[int]) -> None:
+        self.warm_index()
+        tracker = v2.CryptoPriceTracker(api=self.api)
+        self.api = None  # no network in these
+        for size in sizes:
+            quotes = self.quotes(size)
+            ids = list(quotes)
+            market = self.market_quotes(size)
+            raw_markets = self.emulator.coins[:size]
+            self.bench("format", "format_price", size,
+                       lambda _: [tracker.format_price(quotes, coin_id) for coin_id in ids])
+            self.bench("format", "display_prices", size,
+                       lambda _: tracker.display_prices(ids, quotes))
+            self.bench("format", "display_coins_data", size,
+                       lambda _: tracker.display_coins_data(market))
+            self.bench("format", "parse_market_quotes", size,
+                       lambda _: [v2.CoinQuote.from_market(coin) for coin in raw_markets])
+
+    def run_cli(self, sizes: List[int]) -> None:
+        self.warm_index()
+        v2.use_watchlist(os.path.join(self.workdir, "watchlist.json"))  # never the user's own
+        for size in sizes:
+            ids = self.coin_ids(size)
+            store_path = os.path.join(self.workdir, f"watchlist-{size}.json")
+            v2.JsonWatchlistStore(store_path).save(ids)
+
+            def previous_selection(_):
+                v2.use_watchlist(store_path)
+                with scripted_input(["m"]):
+                    v2.previous_selection()
+
+            self.bench("cli", "previous_selection", size, previous_selection, self.fresh_api)
+
+            def top_coins(_):
+                with scripted_input(["m"]):
+                    v2.top_coins(size)
+
+            self.bench("cli", "top_coins", size, top_coins, self.fresh_api)
+            self.bench("cli", "watch_top_x3", size,
+                       lambda api: v2.watch(interval=0, limit=size, iterations=3, api=api), self.fresh_uncached_api)
+
+        def user_coins(_):
+            with scripted_input([", ".join(SEARCH_NAMES), "m"]):
+                v2.user_coins()
+
+        self.bench("cli", "user_coins_x5", len(SEARCH_NAMES), user_coins, self.fresh_api)
+
+        def add_and_remove(_):
+            v2.use_watchlist(os.path.join(self.workdir, "edit.json"))
+            with scripted_input([", ".join(SEARCH_NAMES), "m"]):
+                v2.add_coins([])
+            with scripted_input([", ".join(SEARCH_NAMES)]):
+                v2.remove_coins()
+
+        self.bench("cli", "add_then_remove_x5", len(SEARCH_NAMES), add_and_remove, self.fresh_api)
+
+    def run_dashboard(self, sizes: List[int]) -> bool:
+        """Render paths of the v2 dashboard; returns False when Tk has no display to draw on"""
+        try:
+            import tkinter as tk
+            import Crypto_Prices_Interface_v2 as dashboard
+        except ImportError as e:
+            print(f"Skipping dashboard benchmarks: {e}", file=sys.stderr)
+            return False
+        self.warm_index()
+        try:
+            window = tk.Tk()
+        except tk.TclError:
+            window = None
+        if window is None:
+            # No display: measure building the table rows, which is the Python side of a render
+            app = dashboard.CryptoTrackerGUIv2.__new__(dashboard.CryptoTrackerGUIv2)
+            for size in sizes:
+                market = self.market_quotes(size)
+                self.bench("dashboard", "format_coin_rows", size,
+                           lambda _: [app.format_coin_row(quote, i) for i, quote in enumerate(market)])
+            print("Skipping Tk render benchmarks: no display", file=sys.stderr)
+            return False
+
+        window.withdraw()
+        app = dashboard.CryptoTrackerGUIv2(window)
+        try:
+            for size in sizes:
+                market = self.market_quotes(size)
+                quotes = self.quotes(size)
+                ids = list(quotes)
+
+                def first_render(_):
+                    app.coin_table.clear()
+                    app.display_formatted_coins(market)
+                    window.update_idletasks()
+
+                def rerender(_):
+                    app.display_formatted_coins(market)
+                    window.update_idletasks()
+
+                self.bench("dashboard", "display_formatted_coins", size, first_render)
+                self.bench("dashboard", "display_formatted_coins_unchanged", size, rerender)
+
+                def changed(_):
+                    self.emulator.tick()
+                    return self.market_quotes(size)
+
+                self.bench("dashboard", "display_formatted_coins_changed", size,
+                           lambda new_market: (app.display_formatted_coins(new_market),
+                                               window.update_idletasks()), changed)
+                self.bench("dashboard", "display_watchlist", size,
+                           lambda _: (app.display_watchlist(ids, quotes), window.update_idletasks()))
+        finally:
+            app.close()
+            window.destroy()
+        return True
+
+def format_result(result: Dict[str, Any]) -> str:
+    memory = result["peak_memory_bytes"]
+    memory_text = f"{memory / 1024:>9.0f} KB" if memory is not None else "        n/a"
+    return (f"{result['group']:<10} {result['name']:<34} {result['coins']:>6} coins "
+            f"{result['wall_seconds'] * 1000:>9.1f} ms {result['api_calls']:>4} calls "
+            f"{result['rate_limit_wait_seconds']:>6.2f}s wait {memory_text}")
+
+def compare(results: List[Dict], baseline_path: str) -> None:
+    """Print wall-time and call-count changes against an earlier --output file"""
+    with open(baseline_path, "r") as file:
+        baseline = json.load(file)
+    before = {(r["group"], r["name"], r["coins"]): r for r in baseline.get("results", [])}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = before.get((result["group"], result["name"], result["coins"]))
+        if old is None or not old["wall_seconds"]:
+            continue
+        change = (result["wall_seconds"] - old["wall_seconds"]) / old["wall_seconds"] * 100
+        calls = result["api_calls"] - old["api_calls"]
+        print(f"{result['group']:<10} {result['name']:<34} {result['coins']:>6} coins "
+              f"{change:>+7.1f}% time {calls:>+4} calls")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Crypto Price Tracker v2 benchmarks")
+    parser.add_argument("--sizes", default="10,100,1000,5000",
+                        help="comma-separated coin counts (default: 10,100,1000,5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark (median is reported)")
+    parser.add_argument("--groups", default="api,format,cli,dashboard",
+                        help="comma-separated groups to run (default: all)")
+    parser.add_argument("--latency", type=float, default=0.0, help="emulator latency per request, seconds")
+    parser.add_argument("--calls-per-minute", type=int, default=50,
+                        help="client rate budget, as on the free tier (default: 50)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory runs")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="show changes against an earlier --output file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    groups = [group.strip() for group in args.groups.split(",") if group.strip()]
+
+    with CoinGeckoEmulator(coins=max(sizes + [len(SEARCH_NAMES)]), latency=args.latency) as emulator:
+        runner = BenchmarkRunner(emulator, repeat=max(args.repeat, 1),
+                                 calls_per_minute=args.calls_per_minute, memory=not args.no_memory)
+        tk_rendered = None
+        if "api" in groups:
+            runner.run_api(sizes)
+        if "format" in groups:
+            runner.run_format(sizes)
+        if "cli" in groups:
+            runner.run_cli(sizes)
+        if "dashboard" in groups:
+            tk_rendered = runner.run_dashboard(sizes)
+        shutil.rmtree(runner.workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": v2.json_backend,
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "calls_per_minute": args.calls_per_minute,
+            "tk_rendered": tk_rendered,
+        },
+        "results": runner.results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nWrote {len(runner.results)} results to {args.output}")
+    if args.compare:
+        compare(runner.results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,226 @@
 import tkinter as tk
-from tkinter import scrolledtext, messagebox, simpledialog
+from tkinter import scrolledtext, messagebox, simpledialog, ttk
 import sys
 import os
+import argparse
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from Crypto_Prices_v2 import CoinGeckoAPI, CryptoPriceTracker
+from Crypto_Prices_v2 import (CoinGeckoAPI, CoinQuote, CryptoPriceTracker, Watchlist,
+                              action_profiler, profiled, tracer, traced)
+
+class BackgroundTask:
+    """One unit of background work: a cancel flag plus a queue of progress updates"""
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.updates = queue.Queue()
+        self.future = None
+        self.profile_session = None  # the --profile action this work belongs to
+        self.trace_span = None  # the --trace span this work belongs to
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report(self, update):
+        """Queue a progress update for the Tk thread (safe to call from workers)"""
+        self.updates.put(update)
+
+class CoinTable(tk.Frame):
+    """ttk.Treeview table keyed by coin id that only touches the rows and cells that changed
+    
+    Treeview only lays out the rows in view, and refreshes are diffed against the last
+    rendered values, so a refresh of a large view costs as much as the cells that moved.
+    """
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.caption = tk.Label(self, text="", font=("Arial", 11, "bold"), anchor="w")
+        self.tree = ttk.Treeview(self, show="headings")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        
+        self.caption.pack(fill=tk.X, pady=(0, 5))
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.columns = ()
+        self.rows = {}    # row key -> values last rendered
+        self.order = []   # row keys in display order
+
+    def set_columns(self, columns):
+        """Configure (heading, width, anchor) columns, dropping rows if the layout changes"""
+        columns = tuple(columns)
+        if columns == self.columns:
+            return
+        self.clear()
+        self.columns = columns
+        self.tree.configure(columns=[f"c{i}" for i in range(len(columns))])
+        for i, (heading, width, anchor) in enumerate(columns):
+            self.tree.heading(f"c{i}", text=heading, anchor=anchor)
+            self.tree.column(f"c{i}", width=width, minwidth=40, anchor=anchor, stretch=(i == 1))
+
+    def clear(self):
+        self.tree.delete(*self.order)
+        self.rows.clear()
+        self.order = []
+
+    def update_rows(self, rows):
+        """Bring the table in line with [(key, values)], returning how many cells changed"""
+        changed = 0
+        order = []
+        seen = set()
+        for key, values in rows:
+            if key in seen:
+                continue
+            seen.add(key)
+            order.append(key)
+            old_values = self.rows.get(key)
+            if old_values is None:
+                self.tree.insert("", tk.END, iid=key, values=values)
+                changed += len(values)
+            elif old_values != values:
+                for i, (old, new) in enumerate(zip(old_values, values)):
+                    if old != new:
+                        self.tree.set(key, f"c{i}", new)
+                        changed += 1
+            self.rows[key] = values
+        
+        removed = [key for key in self.order if key not in seen]
+        if removed:
+            self.tree.delete(*removed)
+            for key in removed:
+                del self.rows[key]
+        if order != self.order:
+            # One call reorders everything, instead of a move per row
+            self.tree.set_children("", *order)
+        self.order = order
+        return changed
+
+class AutoRefresher:
+    """Re-runs the visible view on its own interval, within the API rate budget
+    
+    Refreshes pause while the window is minimized or unfocused, and the interval backs
+    off when the shared token bucket runs low or a refresh fails.
+    """
+    # Base interval per view (s); kept above the response cache TTLs so each refresh is live
+    INTERVALS = {"watchlist": 35, "top": 65}
+    MAX_INTERVAL = 600
+    # Fraction of the calls-per-minute budget auto-refresh may use
+    BUDGET_SHARE = 0.5
+    # Back off when fewer than this fraction of the bucket's tokens are left
+    LOW_BUDGET = 0.2
+
+    def __init__(self, window, rate_limiter):
+        self.window = window
+        self.rate_limiter = rate_limiter
+        self.enabled = True
+        self.paused = False
+        self.view = None
+        self.refresh = None
+        self.calls_per_refresh = 1
+        self.backoff = 1
+        self.timer = None
+        self.due = False
+
+    def interval_for(self, view, calls_per_refresh):
+        """Seconds between refreshes of a view costing calls_per_refresh API calls"""
+        base = self.INTERVALS.get(view[0], 60)
+        # Never let auto-refresh alone spend more than its share of the budget
+        budget_per_minute = self.rate_limiter.calls_per_minute * self.BUDGET_SHARE
+        budget_floor = calls_per_refresh * 60.0 / budget_per_minute
+        return min(self.MAX_INTERVAL, max(base, budget_floor) * self.backoff)
+
+    def schedule(self, view, refresh, calls_per_refresh=1, succeeded=True):
+        """Arm the timer for the view that was just shown"""
+        self._stop_timer()
+        self.view = view
+        self.refresh = refresh
+        self.calls_per_refresh = max(1, calls_per_refresh)
+        
+        low_budget = self.rate_limiter.available() < self.rate_limiter.capacity * self.LOW_BUDGET
+        if succeeded and not low_budget:
+            self.backoff = 1
+        else:
+            self.backoff = min(self.backoff * 2, 16)
+        
+        if self.enabled:
+            delay = self.interval_for(view, self.calls_per_refresh)
+            self.timer = self.window.after(int(delay * 1000), self._tick)
+            return delay
+        return None
+
+    def cancel(self):
+        """Forget the current view (e.g. the user switched to a text view)"""
+        self._stop_timer()
+        self.view = None
+        self.refresh = None
+
+    def _stop_timer(self):
+        if self.timer is not None:
+            self.window.after_cancel(self.timer)
+            self.timer = None
+        self.due = False
+
+    def _tick(self):
+        self.timer = None
+        if self.paused:
+            # Run as soon as the window is back instead of on the next full interval
+            self.due = True
+            return
+        self.refresh()
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        if self.due and self.enabled and self.refresh is not None:
+            self.due = False
+            self.refresh()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            # Keep the view, so turning auto-refresh back on re-arms it
+            self._stop_timer()
+        elif self.view is not None and self.timer is None:
+            self.schedule(self.view, self.refresh, self.calls_per_refresh)
 
 class CryptoTrackerGUIv2:
+    # How often the Tk thread checks on background work (ms)
+    POLL_INTERVAL = 50
+    # How long background work waits for the profiler while a Tk callback holds it (s)
+    PROFILE_WAIT = 1.0
+
     def __init__(self, window):
         self.window = window
         window.title("Crypto Price Tracker v2 - CoinGecko API")
         window.geometry("900x600")
         
         self.tracker = CryptoPriceTracker()
-        self.coins_data = self.tracker.load_coins()
+        self.coins_data = self.tracker.load_watchlist()
+        
+        # Network calls run here; results come back to the Tk thread via window.after
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gui-fetch")
+        self.view_task = None
+        self.active_tasks = set()
+        self.current_view = None
+        self.auto_refresh = AutoRefresher(window, self.tracker.api.rate_limiter)
+        self.auto_refresh_var = tk.BooleanVar(value=True)
 
         # --- Widgets ---
         self.title_label = tk.Label(window, text="Crypto Price Tracker v2 - CoinGecko API", 
                                    font=("Arial", 16, "bold"), fg="#2E8B57")
         self.output_text = scrolledtext.ScrolledText(window, width=110, height=25, 
                                                    font=("Courier New", 10))
+        self.coin_table = CoinTable(window)
         self.status_label = tk.Label(window, text="Ready", fg="#666666")
+        self.progress_bar = ttk.Progressbar(window, mode="indeterminate", length=200)
 
         # --- Button Frame ---
         self.button_frame = tk.Frame(window)
@@ -43,11 +243,15 @@ class CryptoTrackerGUIv2:
         self.refresh_button = tk.Button(self.button_frame, text="Refresh", 
                                       command=self.refresh_gui, bg="#B0BEC5", fg="black", width=12)
         self.exit_button = tk.Button(self.button_frame, text="Exit", 
-                                   command=window.quit, bg="#BCAAA4", fg="black", width=12)
+                                   command=self.close, bg="#BCAAA4", fg="black", width=12)
+        self.auto_refresh_check = tk.Checkbutton(self.button_frame, text="Auto-refresh",
+                                                 variable=self.auto_refresh_var,
+                                                 command=self.toggle_auto_refresh)
 
         # --- Layout ---
         self.title_label.pack(pady=10)
         self.output_text.pack(padx=10, pady=(0, 10), fill=tk.BOTH, expand=True)
+        self.output_widget = self.output_text
         
         self.button_frame.pack(pady=10)
         
@@ -63,8 +267,16 @@ class CryptoTrackerGUIv2:
         self.refresh_button.grid(row=1, column=3, padx=5, pady=2)
         
         self.exit_button.grid(row=2, column=1, columnspan=2, padx=5, pady=10)
+        self.auto_refresh_check.grid(row=2, column=3, padx=5, pady=10)
         
-        self.status_label.pack(pady=5)
+        self.status_label.pack(pady=(5, 0))
+        self.progress_bar.pack(pady=(0, 5))
+
+        # Pause auto-refresh while minimized or in the background
+        window.bind("<Unmap>", self.on_window_state_change)
+        window.bind("<Map>", self.on_window_state_change)
+        window.bind("<FocusOut>", self.on_focus_change)
+        window.bind("<FocusIn>", self.on_focus_change)
 
         # Display welcome message
         self.display_welcome()
@@ -89,165 +301,358 @@ This version uses the CoinGecko API for fast, reliable cryptocurrency data.
 3. Use "Add/Remove Coins" to manage your personal watchlist
 4. Click "Load Previous" to view your saved coins
 
-💡 Tip: Data updates every time you refresh or load new information.
+💡 Tip: Watchlist and Top N views refresh themselves while "Auto-refresh" is checked.
 
 Ready to track cryptocurrencies? Click any button above to start!
         """
         self.display_output(welcome_msg)
 
+    def show_output_widget(self, widget):
+        """Swap the main area between the text view and the coin table"""
+        if self.output_widget is widget:
+            return
+        self.output_widget.pack_forget()
+        widget.pack(padx=10, pady=(0, 10), fill=tk.BOTH, expand=True, before=self.button_frame)
+        self.output_widget = widget
+
     def display_output(self, data):
         """Display data in the output text area"""
+        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], (dict, CoinQuote)):
+            # Coin data goes to the table
+            self.display_formatted_coins(data)
+            return
+        
+        self.show_output_widget(self.output_text)
+        self.set_view(None)
         self.output_text.config(state=tk.NORMAL)
         self.output_text.delete('1.0', tk.END)
         
-        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-            # Format coin data in a table - don't clear again, just format
-            self.display_formatted_coins(data, clear_first=False)
-        elif isinstance(data, dict):
+        if isinstance(data, dict):
             # Display dictionary data
             for key, value in data.items():
                 if isinstance(value, dict) and 'name' in value and 'price' in value:
                     self.output_text.insert(tk.END, f"{key}: {value['name']} - {value['price']}\n")
                 else:
                     self.output_text.insert(tk.END, f"{key}: {value}\n")
-            self.output_text.config(state=tk.DISABLED)
         else:
             # Display string data
             self.output_text.insert(tk.END, str(data))
-            self.output_text.config(state=tk.DISABLED)
+        self.output_text.config(state=tk.DISABLED)
 
-    def display_formatted_coins(self, coins_data, clear_first=True):
-        """Display formatted coin data in a table"""
-        if clear_first:
-            self.output_text.config(state=tk.NORMAL)
-            self.output_text.delete('1.0', tk.END)
-            
-        if not coins_data:
-            self.output_text.insert(tk.END, "No data available\n")
-            self.output_text.config(state=tk.DISABLED)
-            return
-        
-        # Show count and header
-        self.output_text.insert(tk.END, f"📊 Displaying {len(coins_data)} cryptocurrencies\n\n")
-        
-        # Header with better alignment using monospace formatting
-        header = f"{'Rank':<4} {'Name':<20} {'Symbol':<8} {'Price':<15} {'24h Change':<12} {'Market Cap':<12}\n"
-        separator = "=" * 78 + "\n"
-        
-        self.output_text.insert(tk.END, header)
-        self.output_text.insert(tk.END, separator)
+    def format_coin_row(self, quote, index):
+        """Format one CoinQuote as table cells"""
+        rank = quote.rank if quote.rank is not None else index + 1
+        market_cap = quote.market_cap
+        
+        # Format price
+        price_str = quote.price_text() if quote.price is not None and quote.price > 0 else "N/A"
+        
+        # Format market cap
+        if market_cap is not None and market_cap > 0:
+            if market_cap >= 1e12:
+                market_cap_str = f"${market_cap/1e12:.1f}T"
+            elif market_cap >= 1e9:
+                market_cap_str = f"${market_cap/1e9:.1f}B"
+            elif market_cap >= 1e6:
+                market_cap_str = f"${market_cap/1e6:.0f}M"
+            else:
+                market_cap_str = f"${market_cap:,.0f}"
+        else:
+            market_cap_str = "N/A"
         
-        for i, coin in enumerate(coins_data):
+        return (str(rank), quote.name, quote.symbol, price_str, quote.change_text(), market_cap_str)
+
+    MARKET_COLUMNS = (("Rank", 60, tk.E), ("Name", 200, tk.W), ("Symbol", 80, tk.W),
+                      ("Price", 140, tk.E), ("24h Change", 100, tk.E), ("Market Cap", 110, tk.E))
+    WATCHLIST_COLUMNS = (("#", 50, tk.E), ("Coin", 260, tk.W), ("Price", 160, tk.E),
+                         ("24h Change", 120, tk.E))
+
+    @traced("render.table")
+    def display_formatted_coins(self, coins_data):
+        """Display formatted coin data in the table, updating only what changed"""
+        rows = []
+        for i, quote in enumerate(coins_data or []):
             try:
-                rank = coin.get("market_cap_rank", i+1)
-                name = coin.get("name", "N/A")[:19]  # Shorter for better alignment
-                symbol = coin.get("symbol", "N/A").upper()
-                price = coin.get("current_price", 0)
-                change_24h = coin.get("price_change_percentage_24h", 0)
-                market_cap = coin.get("market_cap", 0)
-                
-                # Format price
-                price_str = f"${price:,.2f}" if isinstance(price, (int, float)) and price > 0 else "N/A"
-                
-                # Format 24h change
-                if isinstance(change_24h, (int, float)):
-                    change_str = f"{change_24h:+.2f}%"
-                else:
-                    change_str = "N/A"
-                
-                # Format market cap
-                if isinstance(market_cap, (int, float)) and market_cap > 0:
-                    if market_cap >= 1e12:
-                        market_cap_str = f"${market_cap/1e12:.1f}T"
-                    elif market_cap >= 1e9:
-                        market_cap_str = f"${market_cap/1e9:.1f}B"
-                    elif market_cap >= 1e6:
-                        market_cap_str = f"${market_cap/1e6:.0f}M"
-                    else:
-                        market_cap_str = f"${market_cap:,.0f}"
-                else:
-                    market_cap_str = "N/A"
-                
-                line = f"{rank:<4} {name:<20} {symbol:<8} {price_str:<15} {change_str:<12} {market_cap_str:<12}\n"
-                self.output_text.insert(tk.END, line)
-                
+                if isinstance(quote, dict):
+                    quote = CoinQuote.from_market(quote)
+                rows.append((quote.id or f"row-{i}", self.format_coin_row(quote, i)))
             except Exception as e:
-                self.output_text.insert(tk.END, f"Error displaying coin {i+1}: {str(e)}\n")
-        
-        # Now disable the text area
-        self.output_text.config(state=tk.DISABLED)
+                rows.append((f"row-{i}", ("", f"Error displaying coin {i+1}: {str(e)}", "", "", "", "")))
+        
+        if not rows:
+            self.display_output("No data available\n")
+            return 0
+        
+        tracer.annotate(rows=len(rows))
+        self.show_output_widget(self.coin_table)
+        self.coin_table.set_columns(self.MARKET_COLUMNS)
+        self.coin_table.caption.config(text=f"📊 Displaying {len(rows)} cryptocurrencies")
+        self.coin_table.update_rows(rows)
+        return len(rows)
 
     def update_status(self, message):
         """Update status label"""
         self.status_label.config(text=message)
         self.window.update_idletasks()
 
+    def set_view(self, view):
+        """Record what the main area shows; text views are not auto-refreshed"""
+        self.current_view = view
+        if view is None:
+            self.auto_refresh.cancel()
+
+    def toggle_auto_refresh(self):
+        self.auto_refresh.set_enabled(self.auto_refresh_var.get())
+
+    def on_window_state_change(self, event):
+        # Child widgets map/unmap too (e.g. swapping the table and text views)
+        if event.widget is self.window:
+            self._check_window_active()
+
+    def on_focus_change(self, event):
+        # Focus also moves between our own widgets and dialogs; check once it settles
+        self.window.after(100, self._check_window_active)
+
+    def _check_window_active(self):
+        try:
+            focused = self.window.focus_get() is not None
+        except (KeyError, tk.TclError):
+            focused = False
+        if self.window.state() == "iconic" or not focused:
+            self.auto_refresh.pause()
+        else:
+            self.auto_refresh.resume()
+
+    def schedule_refresh(self, view, refresh, calls_per_refresh, succeeded=True):
+        """Queue the next auto-refresh of the view on screen"""
+        if self.current_view != view:
+            return None
+        return self.auto_refresh.schedule(view, refresh, calls_per_refresh, succeeded)
+
+    def run_in_background(self, work, on_done, on_error, on_progress=None, is_view=True):
+        """Run work(task) on the worker pool and deliver its results on the Tk thread
+        
+        Starting a new view cancels the view still loading, and its late results are dropped.
+        Non-view work (adding/removing coins) always runs to completion.
+        """
+        task = BackgroundTask()
+        session = action_profiler.current_session()
+        if session is not None:
+            # Keep the profiled action open until its results have been rendered
+            session.hold()
+            task.profile_session = session
+            work = session.wrap(work, wait=self.PROFILE_WAIT)
+            on_done, on_error = session.wrap(on_done), session.wrap(on_error)
+            if on_progress is not None:
+                on_progress = session.wrap(on_progress)
+        span = tracer.current_span()
+        if span is not None:
+            # The action's span ends once its results have been rendered
+            span.hold()
+            task.trace_span = span
+            work = tracer.bind(span, "task.work", work)
+            on_done = tracer.bind(span, "task.done", on_done)
+            on_error = tracer.bind(span, "task.error", on_error)
+            if on_progress is not None:
+                on_progress = tracer.bind(span, "task.progress", on_progress)
+        if is_view:
+            if self.view_task is not None:
+                self.view_task.cancel()
+            self.view_task = task
+            self.auto_refresh.cancel()
+        self.active_tasks.add(task)
+        self.progress_bar.start(10)
+        if session is not None:
+            # Only one cProfile runs at a time, and this handler holds it until it returns;
+            # start the work after that so the fetch lands in the action's profile
+            self.window.after_idle(self._start_task, task, work)
+        else:
+            self._start_task(task, work)
+        self.window.after(self.POLL_INTERVAL, self._poll_task, task, on_done, on_error, on_progress)
+        return task
+
+    def _start_task(self, task, work):
+        if not task.cancelled:
+            task.future = self.executor.submit(work, task)
+
+    def after_action(self, callback):
+        """Wrap a result callback to run once the background action has finished
+        
+        Message boxes run a nested event loop, and the watchlist view they lead to is an
+        action of its own, so neither should be charged to the action's profile or span.
+        """
+        return lambda *args: self.window.after_idle(callback, *args)
+
+    def _poll_task(self, task, on_done, on_error, on_progress):
+        """Check on a background task from the Tk thread"""
+        if task.cancelled:
+            self._finish_task(task)
+            self._release_task(task)
+            return
+        
+        if on_progress is not None:
+            while not task.updates.empty():
+                on_progress(task.updates.get_nowait())
+        
+        if task.future is None or not task.future.done():
+            self.window.after(self.POLL_INTERVAL, self._poll_task, task, on_done, on_error, on_progress)
+            return
+        
+        self._finish_task(task)
+        try:
+            try:
+                result = task.future.result()
+            except Exception as e:
+                on_error(e)
+                return
+            on_done(result)
+        finally:
+            self._release_task(task)
+
+    def _release_task(self, task):
+        """Close the profile and trace span the task was keeping open"""
+        if task.profile_session is not None:
+            task.profile_session.release()
+            task.profile_session = None
+        if task.trace_span is not None:
+            task.trace_span.end()
+            task.trace_span = None
+
+    def _finish_task(self, task):
+        self.active_tasks.discard(task)
+        if self.view_task is task:
+            self.view_task = None
+        if not self.active_tasks:
+            self.progress_bar.stop()
+
+    def close(self):
+        """Cancel background work and quit"""
+        for task in list(self.active_tasks):
+            task.cancel()
+        self.executor.shutdown(wait=False)
+        self.window.quit()
+
+    @traced("gui.load_previous_selection")
+    @profiled("load_previous_selection")
     def load_previous_selection_gui(self):
         """Load and display previously saved coins"""
         self.update_status("Loading previous selection...")
-        self.coins_data = self.tracker.load_coins()
+        self.coins_data = self.tracker.load_watchlist()
         
         if not self.coins_data:
+            if self.view_task is not None:
+                self.view_task.cancel()
             self.display_output("No previously saved coins found.\nUse 'Add Coins' or 'Search Coins' to start tracking cryptocurrencies!")
             self.update_status("No saved coins found.")
             return
         
-        try:
-            price_data = self.tracker.api.get_multiple_coin_prices(self.coins_data)
-            if not price_data:
+        coin_ids = list(self.coins_data)
+        view = ("watchlist",)
+        refreshing = self.current_view == view
+        calls = len(self.tracker.api.chunk_ids(coin_ids))
+        
+        def on_done(quotes):
+            if not quotes:
+                if refreshing:
+                    # Keep the last prices on screen and try again later
+                    delay = self.schedule_refresh(view, self.load_previous_selection_gui, calls, succeeded=False)
+                    self.update_status(self.retry_message(delay))
+                    return
                 self.display_output("Failed to fetch price data. Please try again.")
                 self.update_status("API request failed.")
                 return
-            
-            # Format the data for display
-            self.output_text.config(state=tk.NORMAL)
-            self.output_text.delete('1.0', tk.END)
-            
-            self.output_text.insert(tk.END, f"💰 Your Watchlist ({len(self.coins_data)} coins)\n\n")
-            
-            header = f"{'Coin':<20} {'Price':<20} {'24h Change':<12}\n"
-            separator = "=" * 55 + "\n"
-            
-            self.output_text.insert(tk.END, header)
-            self.output_text.insert(tk.END, separator)
-            
-            for coin_id in self.coins_data:
-                formatted_price = self.tracker.format_price(price_data, coin_id)
-                coin_name = coin_id.replace('-', ' ').title()
-                # Parse the formatted price to separate price and 24h change  
-                if " (" in formatted_price and ")" in formatted_price:
-                    price_part = formatted_price.split(" (")[0]
-                    change_part = "(" + formatted_price.split(" (")[1] 
-                    line = f"{coin_name:<20} {price_part:<20} {change_part:<12}\n"
-                else:
-                    line = f"{coin_name:<20} {formatted_price:<20} {'N/A':<12}\n"
-                self.output_text.insert(tk.END, line)
-            
-            self.output_text.config(state=tk.DISABLED)
-            self.update_status(f"Loaded {len(self.coins_data)} saved coins.")
-            
-        except Exception as e:
+            self.display_watchlist(coin_ids, quotes)
+            self.update_status(f"Loaded {len(coin_ids)} saved coins.")
+            self.schedule_refresh(view, self.load_previous_selection_gui, calls)
+        
+        def on_error(e):
             self.display_output(f"Error loading coins: {str(e)}")
             self.update_status("Error occurred.")
+        
+        self.run_in_background(lambda task: self.tracker.get_price_quotes(coin_ids),
+                               on_done, on_error)
+
+    @staticmethod
+    def retry_message(delay):
+        if delay is None:
+            return "Refresh failed."
+        return f"Refresh failed; retrying in {delay:.0f}s."
 
+    @traced("render.watchlist")
+    def display_watchlist(self, coin_ids, quotes):
+        """Display watchlist prices"""
+        rows = []
+        for i, coin_id in enumerate(coin_ids):
+            quote = quotes.get(coin_id)
+            coin_name = coin_id.replace('-', ' ').title()
+            if quote is None:
+                price_part, change_part = "Price not found", "N/A"
+            else:
+                price_part, change_part = quote.price_text(), quote.change_text()
+            rows.append((coin_id, (str(i + 1), coin_name, price_part, change_part)))
+        tracer.annotate(rows=len(rows))
+        
+        self.show_output_widget(self.coin_table)
+        self.set_view(("watchlist",))
+        self.coin_table.set_columns(self.WATCHLIST_COLUMNS)
+        self.coin_table.caption.config(text=f"💰 Your Watchlist ({len(coin_ids)} coins)")
+        self.coin_table.update_rows(rows)
+
+    @traced("gui.top_coins")
+    @profiled("top_coins")
     def top_coins_gui(self, limit):
-        """Fetch and display top coins"""
+        """Fetch and display top coins, drawing each page as it arrives"""
         self.update_status(f"Fetching top {limit} cryptocurrencies...")
-        
-        try:
-            coins_data = self.tracker.api.get_top_coins(limit)
-            if not coins_data:
+        page_size = self.tracker.api.max_per_page
+        rows = []
+        view = ("top", limit)
+        # A refresh of the view on screen updates it in place once all pages are in
+        refreshing = self.current_view == view
+        calls = (limit + page_size - 1) // page_size
+        
+        def fetch(task):
+            page = []
+            for coin in self.tracker.iter_top_quotes(limit):
+                if task.cancelled:
+                    break
+                page.append(coin)
+                if len(page) >= page_size:
+                    task.report(page)
+                    page = []
+            if page:
+                task.report(page)
+        
+        def on_progress(page):
+            rows.extend(page)
+            if not refreshing:
+                self.display_formatted_coins(rows)
+                self.set_view(view)
+            self.update_status(f"Fetched {len(rows)} of top {limit} cryptocurrencies...")
+        
+        def on_done(_):
+            if not rows:
+                if refreshing:
+                    delay = self.schedule_refresh(view, refresh, calls, succeeded=False)
+                    self.update_status(self.retry_message(delay))
+                    return
                 self.display_output("Failed to fetch top coins data. Please try again.")
                 self.update_status("API request failed.")
                 return
-            
-            self.display_formatted_coins(coins_data, clear_first=True)
-            self.update_status(f"Displaying top {len(coins_data)} cryptocurrencies.")
-            
-        except Exception as e:
+            self.display_formatted_coins(rows)
+            self.set_view(view)
+            self.update_status(f"Displaying top {len(rows)} cryptocurrencies.")
+            self.schedule_refresh(view, refresh, calls)
+        
+        def refresh():
+            self.top_coins_gui(limit)
+        
+        def on_error(e):
             self.display_output(f"Error fetching top coins: {str(e)}")
             self.update_status("Error occurred.")
+        
+        self.run_in_background(fetch, on_done, on_error, on_progress)
 
+    @traced("gui.search_coins")
     def search_coins_gui(self):
         """Search and track user-specified coins"""
         # Create custom dialog centered on main window
@@ -300,14 +705,30 @@ Ready to track cryptocurrencies? Click any button above to start!
         self.update_status("Searching for coins...")
         coin_names = [coin.strip() for coin in coins_input.split(",")]
         
-        found_coins = []
+        def search(task):
+            resolution = self.tracker.resolve_many(coin_names)
+            found_coins = self.tracker.resolved_ids(resolution)
+            if not found_coins or task.cancelled:
+                return resolution, found_coins, None
+            return resolution, found_coins, self.tracker.get_price_quotes(found_coins)
+        
+        def on_error(e):
+            self.display_output(f"Error fetching coin data: {str(e)}")
+            self.update_status("Error occurred.")
+        
+        # Profiled from here on: the time the dialog was open is not part of the action
+        action_profiler.profile("search_coins", self.run_in_background,
+                                search, self.display_search_results, on_error)
+
+    @traced("render.search")
+    def display_search_results(self, result):
+        """Display search matches with their prices"""
+        resolution, found_coins, quotes = result
         search_results = ""
         
-        for coin_name in coin_names:
-            coin_id = self.tracker.coin_name_to_id(coin_name)
-            if coin_id:
-                found_coins.append(coin_id)
-                search_results += f"✅ Found: {coin_name} → {coin_id}\n"
+        for coin_name, match in resolution.items():
+            if match["id"]:
+                search_results += f"✅ Found: {coin_name} → {match['id']}\n"
             else:
                 search_results += f"❌ Could not find: {coin_name}\n"
         
@@ -317,8 +738,7 @@ Ready to track cryptocurrencies? Click any button above to start!
             return
         
         try:
-            price_data = self.tracker.api.get_multiple_coin_prices(found_coins)
-            if not price_data:
+            if not quotes:
                 self.display_output("Failed to fetch price data.")
                 self.update_status("API request failed.")
                 return
@@ -330,7 +750,7 @@ Ready to track cryptocurrencies? Click any button above to start!
             output += "-" * 60 + "\n"
             
             for coin_id in found_coins:
-                formatted_price = self.tracker.format_price(price_data, coin_id)
+                formatted_price = self.tracker.format_price(quotes, coin_id)
                 coin_name = coin_id.replace('-', ' ').title()
                 output += f"{coin_name:<25} {formatted_price:<32}\n"
             
@@ -341,6 +761,7 @@ Ready to track cryptocurrencies? Click any button above to start!
             self.display_output(f"Error fetching coin data: {str(e)}")
             self.update_status("Error occurred.")
 
+    @traced("gui.add_coins")
     def add_coins_gui(self):
         """Add coins to watchlist"""
         # Create custom dialog centered on main window
@@ -391,23 +812,27 @@ Ready to track cryptocurrencies? Click any button above to start!
         self.update_status("Adding coins...")
         coin_names = [coin.strip() for coin in new_coins.split(',')]
         
-        new_coin_ids = []
-        for coin_name in coin_names:
-            coin_id = self.tracker.coin_name_to_id(coin_name)
-            if coin_id:
-                new_coin_ids.append(coin_id)
+        def on_error(e):
+            messagebox.showerror("Error", f"Error adding coins: {str(e)}")
+            self.update_status("Error occurred.")
         
+        action_profiler.profile("add_coins", self.run_in_background,
+                                lambda task: self.tracker.resolved_ids(self.tracker.resolve_many(coin_names)),
+                                self.after_action(self.finish_add_coins), self.after_action(on_error),
+                                is_view=False)
+
+    def finish_add_coins(self, new_coin_ids):
+        """Save resolved coins to the watchlist"""
         if new_coin_ids:
-            updated_coins = list(set(self.coins_data + new_coin_ids))  # Remove duplicates
-            self.tracker.save_coins(updated_coins)
-            self.coins_data = updated_coins
+            # Merge into the saved list as it is now; another process may have changed it
+            self.coins_data = self.tracker.add_coins(new_coin_ids)
             messagebox.showinfo("Success", f"Added {len(new_coin_ids)} coins to your watchlist!")
             self.load_previous_selection_gui()
         else:
             messagebox.showwarning("No Coins Added", "No valid coins were found.")
-        
-        self.update_status("Ready")
+            self.update_status("Ready")
 
+    @traced("gui.remove_coins")
     def remove_coins_gui(self):
         """Remove coins from watchlist"""
         if not self.coins_data:
@@ -433,8 +858,8 @@ Ready to track cryptocurrencies? Click any button above to start!
         # Show current coins list
         coins_text = tk.Text(dialog, height=8, width=50, font=("Arial", 10))
         coins_text.pack(pady=5)
-        for coin in self.coins_data:
-            coins_text.insert(tk.END, f"• {coin.replace('-', ' ').title()}\n")
+        # One insert for the whole list; per-line inserts crawl on large watchlists
+        coins_text.insert(tk.END, "".join(f"• {coin.replace('-', ' ').title()}\n" for coin in self.coins_data))
         coins_text.config(state=tk.DISABLED)
         
         tk.Label(dialog, text="Enter coins to remove (comma-separated):", 
@@ -469,35 +894,58 @@ Ready to track cryptocurrencies? Click any button above to start!
         
         coins_to_remove_names = [coin.strip().lower() for coin in coins_to_remove.split(',')]
         
-        coins_to_remove_ids = []
-        for coin_name in coins_to_remove_names:
-            # Try exact match first
-            if coin_name in self.coins_data:
-                coins_to_remove_ids.append(coin_name)
-            else:
-                # Try name-to-id conversion
-                coin_id = self.tracker.coin_name_to_id(coin_name)
-                if coin_id and coin_id in self.coins_data:
-                    coins_to_remove_ids.append(coin_id)
+        # Exact IDs need no lookup; resolve the rest in one batch
+        unmatched_names = [coin_name for coin_name in coins_to_remove_names if coin_name not in self.coins_data]
+        
+        def on_done(resolved_ids):
+            coins_to_remove_ids = Watchlist(coin_name for coin_name in coins_to_remove_names
+                                            if coin_name in self.coins_data)
+            coins_to_remove_ids.add(coin_id for coin_id in resolved_ids if coin_id in self.coins_data)
+            self.finish_remove_coins(coins_to_remove_ids)
         
+        def on_error(e):
+            messagebox.showerror("Error", f"Error removing coins: {str(e)}")
+            self.update_status("Error occurred.")
+        
+        self.update_status("Removing coins...")
+        action_profiler.profile("remove_coins", self.run_in_background,
+                                lambda task: self.tracker.resolved_ids(self.tracker.resolve_many(unmatched_names)),
+                                self.after_action(on_done), self.after_action(on_error), is_view=False)
+
+    def finish_remove_coins(self, coins_to_remove_ids):
+        """Drop resolved coins from the watchlist"""
         if coins_to_remove_ids:
-            updated_coins = [coin_id for coin_id in self.coins_data if coin_id not in coins_to_remove_ids]
-            self.tracker.save_coins(updated_coins)
-            self.coins_data = updated_coins
+            self.coins_data = self.tracker.remove_coins(coins_to_remove_ids)
             messagebox.showinfo("Success", f"Removed {len(coins_to_remove_ids)} coins from your watchlist!")
             self.load_previous_selection_gui()
         else:
             messagebox.showwarning("No Coins Removed", "No matching coins found to remove.")
 
+    @traced("gui.refresh")
+    @profiled("refresh")
     def refresh_gui(self):
         """Refresh current view"""
-        if self.coins_data:
+        if self.current_view is not None and self.current_view[0] == "top":
+            self.top_coins_gui(self.current_view[1])
+        elif self.coins_data:
             self.load_previous_selection_gui()
         else:
             self.display_welcome()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crypto Price Tracker dashboard")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="profile each action with cProfile and write the results to DIR "
+                             "(default: profiles)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record tracing spans to FILE (Chrome trace-event JSON; .jsonl for JSON lines)")
+    args = parser.parse_args()
+    if args.profile:
+        action_profiler.enable(args.profile)
+    if args.trace:
+        tracer.enable(args.trace)
+    
     window = tk.Tk()
     app = CryptoTrackerGUIv2(window)
-    window.protocol("WM_DELETE_WINDOW", app.window.quit)
+    window.protocol("WM_DELETE_WINDOW", app.close)
     window.mainloop()
\ No newline at end of file
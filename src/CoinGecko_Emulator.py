@@ -0,0 +1,327 @@
+# CoinGecko Emulator - local stand-in for the CoinGecko v3 API
+#
+# Serves /simple/price, /coins/markets, /search and /coins/list from synthetic,
+# seeded data so the tracker can be run and measured without the network:
+#
+#     python3 src/CoinGecko_Emulator.py --coins 5000 --latency 0.05 --rate-limit 50
+#     COINGECKO_BASE_URL=http://127.0.0.1:8000/api/v3 python3 src/Crypto_Prices_v2.py
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+# Well-known coins first, so the usual names and symbols resolve like they do upstream
+KNOWN_COINS = [
+    ("bitcoin", "btc", "Bitcoin", 65000.0),
+    ("ethereum", "eth", "Ethereum", 3200.0),
+    ("tether", "usdt", "Tether", 1.0),
+    ("binancecoin", "bnb", "BNB", 580.0),
+    ("solana", "sol", "Solana", 150.0),
+    ("usd-coin", "usdc", "USDC", 1.0),
+    ("ripple", "xrp", "XRP", 0.52),
+    ("dogecoin", "doge", "Dogecoin", 0.15),
+    ("cardano", "ada", "Cardano", 0.45),
+    ("tron", "trx", "TRON", 0.12),
+    ("avalanche-2", "avax", "Avalanche", 35.0),
+    ("chainlink", "link", "Chainlink", 14.0),
+    ("polkadot", "dot", "Polkadot", 6.5),
+    ("litecoin", "ltc", "Litecoin", 80.0),
+    ("wrapped-bitcoin", "wbtc", "Wrapped Bitcoin", 65000.0),
+]
+
+# Units per USD for the vs_currencies we answer
+EXCHANGE_RATES = {"usd": 1.0, "eur": 0.92, "gbp": 0.79, "jpy": 151.0}
+
+class CoinGeckoEmulator:
+    """Threaded HTTP server answering a subset of the CoinGecko v3 API from synthetic data"""
+    max_per_page = 250
+
+    def __init__(self, coins: int = 5000, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 rate_limit: Optional[int] = None, retry_after: int = 1,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit  # calls per minute, None for unlimited
+        self.retry_after = retry_after
+        self.host = host
+        self.port = port
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent_calls = deque()  # monotonic times of calls inside the rate window
+        self.server = None
+        self.thread = None
+        self.requests = {}  # path -> count
+        self.throttled = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.coins = self._generate(coins)
+        self.by_id = {coin["id"]: coin for coin in self.coins}
+        self.listing = [{"id": coin["id"], "symbol": coin["symbol"], "name": coin["name"]}
+                           for coin in self.coins]
+
+    def _generate(self, count: int) -> List[Dict]:
+        """Seeded synthetic coins, ranked by market cap"""
+        coins = []
+        for rank in range(1, count + 1):
+            if rank <= len(KNOWN_COINS):
+                coin_id, symbol, name, price = KNOWN_COINS[rank - 1]
+            else:
+                coin_id, symbol, name = f"coin-{rank}", f"c{rank}", f"Coin {rank}"
+                price = round(10 ** self.random.uniform(-4, 3), 6)
+            coins.append({
+                "id": coin_id,
+                "symbol": symbol,
+                "name": name,
+                "market_cap_rank": rank,
+                "current_price": price,
+                # Strictly decreasing with rank, so ordering matches the rank field
+                "market_cap": round(1.2e12 / rank ** 1.3, 2),
+                "total_volume": round(3e10 / rank ** 1.1, 2),
+                "price_change_percentage_24h": round(self.random.uniform(-12, 12), 4),
+            })
+        return coins
+
+    def tick(self, volatility: float = 0.01) -> None:
+        """Random-walk every price, for exercising refresh and diff paths"""
+        with self.lock:
+            for coin in self.coins:
+                step = self.random.gauss(0, volatility)
+                coin["current_price"] = round(coin["current_price"] * (1 + step), 8)
+                coin["price_change_percentage_24h"] = round(coin["price_change_percentage_24h"] + step * 100, 4)
+
+    # --- endpoints ---------------------------------------------------------
+
+    def simple_price(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        ids = [coin_id.strip() for coin_id in query.get("ids", "").split(",") if coin_id.strip()]
+        currencies = [currency.strip().lower() for currency in query.get("vs_currencies", "").split(",")
+                      if currency.strip()]
+        if not ids or not currencies:
+            return 400, {"error": "Missing parameter ids or vs_currencies"}
+        include_market_cap = query.get("include_market_cap", "").lower() == "true"
+        include_change = query.get("include_24hr_change", "").lower() == "true"
+        result = {}
+        for coin_id in ids:
+            coin = self.by_id.get(coin_id)
+            if coin is None:
+                continue
+            entry = {}
+            for currency in currencies:
+                rate = EXCHANGE_RATES.get(currency)
+                if rate is None:
+                    continue
+                entry[currency] = coin["current_price"] * rate
+                if include_market_cap:
+                    entry[f"{currency}_market_cap"] = coin["market_cap"] * rate
+                if include_change:
+                    entry[f"{currency}_24h_change"] = coin["price_change_percentage_24h"]
+            result[coin_id] = entry
+        return 200, result
+
+    def coins_markets(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        rate = EXCHANGE_RATES.get(query.get("vs_currency", "").lower())
+        if rate is None:
+            return 400, {"error": "invalid vs_currency"}
+        try:
+            per_page = min(max(int(query.get("per_page", 100)), 1), self.max_per_page)
+            page = max(int(query.get("page", 1)), 1)
+        except ValueError:
+            return 400, {"error": "invalid per_page or page"}
+        start = (page - 1) * per_page
+        markets = []
+        for coin in self.coins[start:start + per_page]:
+            market = dict(coin)
+            market["current_price"] = coin["current_price"] * rate
+            market["market_cap"] = coin["market_cap"] * rate
+            market["total_volume"] = coin["total_volume"] * rate
+            markets.append(market)
+        return 200, markets
+
+    def search(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        term = query.get("query", "").strip().lower()
+        matches = []
+        if term:
+            for coin in self.coins:
+                if term in coin["id"] or term in coin["name"].lower() or term == coin["symbol"]:
+                    matches.append({
+                        "id": coin["id"],
+                        "name": coin["name"],
+                        "api_symbol": coin["id"],
+                        "symbol": coin["symbol"].upper(),
+                        "market_cap_rank": coin["market_cap_rank"],
+                    })
+                    if len(matches) >= 25:
+                        break
+        return 200, {"coins": matches, "exchanges": [], "icos": [], "categories": [], "nfts": []}
+
+    def coins_list(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        return 200, self.listing
+
+    def ping(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        return 200, {"gecko_says": "(V3) To the Moon!"}
+
+    routes = {
+        "/simple/price": simple_price,
+        "/coins/markets": coins_markets,
+        "/search": search,
+        "/coins/list": coins_list,
+        "/ping": ping,
+    }
+
+    # --- failure injection ---------------------------------------------------
+
+    def _over_rate_limit(self) -> bool:
+        """Sliding one-minute window, like the free tier's calls-per-minute cap"""
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while self.recent_calls and now - self.recent_calls[0] >= 60:
+                self.recent_calls.popleft()
+            if len(self.recent_calls) >= self.rate_limit:
+                return True
+            self.recent_calls.append(now)
+            return False
+
+    def handle(self, path: str, query: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        """Answer one request: (status, JSON body, extra headers)"""
+        endpoint = path[len("/api/v3"):] if path.startswith("/api/v3") else path
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            roll = self.random.random()
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._over_rate_limit() or roll < self.throttle_rate:
+            with self.lock:
+                self.throttled += 1
+            body = {"status": {"error_code": 429,
+                               "error_message": "You've exceeded the Rate Limit. Please try again later."}}
+            return 429, body, {"Retry-After": str(self.retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            with self.lock:
+                self.errors += 1
+                status = self.random.choice((500, 502, 503))
+            return status, {"error": "Injected server error"}, {}
+
+        route = self.routes.get(endpoint)
+        if route is None:
+            return 404, {"error": f"Unknown endpoint {endpoint}"}, {}
+        status, body = route(self, query)
+        return status, body, {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.requests = {}
+            self.throttled = 0
+            self.errors = 0
+            self.bytes_sent = 0
+            self.recent_calls.clear()
+
+    # --- server lifecycle ------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def start(self) -> str:
+        """Serve on a daemon thread and return the base URL to hand to CoinGeckoAPI"""
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                status, body, headers = emulator.handle(url.path, dict(parse_qsl(url.query)))
+                payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+                if "gzip" in self.headers.get("Accept-Encoding", "") and len(payload) > 1024:
+                    payload = gzip.compress(payload, compresslevel=5)
+                    headers["Content-Encoding"] = "gzip"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                with emulator.lock:
+                    emulator.bytes_sent += len(payload)
+
+            def log_message(self, format, *args):
+                pass  # one line per request would swamp benchmark output
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="coingecko-emulator", daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self) -> "CoinGeckoEmulator":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local CoinGecko API emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--coins", type=int, default=5000, help="number of synthetic coins (default: 5000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--rate-limit", type=int, metavar="N", help="enforce N calls per minute with 429s")
+    parser.add_argument("--tick", type=float, metavar="SECONDS", help="random-walk prices every SECONDS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    emulator = CoinGeckoEmulator(coins=args.coins, latency=args.latency, jitter=args.jitter,
+                                 error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                 rate_limit=args.rate_limit, seed=args.seed,
+                                 host=args.host, port=args.port)
+    base_url = emulator.start()
+    print(f"CoinGecko emulator serving {args.coins} coins at {base_url}")
+    print(f"Point the tracker at it with: COINGECKO_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(args.tick or 3600)
+            if args.tick:
+                emulator.tick()
+    except KeyboardInterrupt:
+        print(f"\nStopped. {emulator.stats()}")
+    finally:
+        emulator.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,1156 @@
 # Crypto Price Tracker v2 - CoinGecko API Version
 
 import requests
+import argparse
+import asyncio
+import atexit
+import codecs
+import cProfile
+import functools
 import json
 import os
+import pstats
+import shutil
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
 import time
-from typing import Dict, List, Optional, Union
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from itertools import chain, count
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests.adapters import HTTPAdapter
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-class CoinGeckoAPI:
+class RateLimiter:
+    """Thread-safe token bucket sized from a calls-per-minute budget
+    
+    A full bucket plus a minute of refill would allow twice the budget in the first minute,
+    so every call is also held to a sliding one-minute window of calls_per_minute calls,
+    the way the API counts them.
+    """
+    window = 60.0
+    
+    def __init__(self, calls_per_minute: int = 50, burst: Optional[int] = None):
+        self.calls_per_minute = calls_per_minute
+        self.capacity = float(burst if burst is not None else calls_per_minute)
+        self.fill_rate = calls_per_minute / 60.0  # tokens per second
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+        self.total_wait = 0.0
+        self.recent = deque()  # start times of the calls in the window, oldest first (some may be queued)
+    
+    def _refill(self, now: float) -> None:
+        """Top up the bucket for the time elapsed since the last refill"""
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.fill_rate)
+            self.last_refill = now
+    
+    def _prune(self, now: float) -> None:
+        while self.recent and self.recent[0] <= now - self.window:
+            self.recent.popleft()
+    
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # Tokens may go negative: each waiter gets its own slot in the queue
+            start = now if self.tokens >= 0 else now + -self.tokens / self.fill_rate
+            self._prune(start)
+            if len(self.recent) >= self.calls_per_minute:
+                # Wait until the call calls_per_minute back has left the window
+                start = max(start, self.recent[-self.calls_per_minute] + self.window)
+            self.recent.append(start)
+            delay = start - now
+            if delay <= 0:
+                return 0.0
+            self.total_wait += delay
+            return delay
+    
+    def acquire(self) -> float:
+        """Block until a call is allowed, returning the time spent waiting"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+    
+    def available(self) -> float:
+        """Number of calls that can be made right now without waiting"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._prune(now)
+            return max(min(self.tokens, self.calls_per_minute - len(self.recent)), 0.0)
+    
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for at least `seconds` (e.g. after a 429)"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.fill_rate)
+
+# CoinGecko free tier: 50 calls/minute, shared by every client in the process
+shared_rate_limiter = RateLimiter(calls_per_minute=50)
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker that fails fast while upstream is unhealthy
+    
+    After `failure_threshold` consecutive failures an endpoint is open and calls are
+    rejected for `reset_timeout` seconds; then a single trial call is let through
+    (half-open) and its outcome closes or re-opens the breaker.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.states = {}  # endpoint -> {"failures", "opened_at", "trial"}
+        self.lock = threading.Lock()
+        self.trips = 0
+    
+    def allow(self, endpoint: str) -> bool:
+        """True if a call to the endpoint may go out now"""
+        with self.lock:
+            state = self.states.get(endpoint)
+            if state is None or state["opened_at"] is None:
+                return True
+            if state["trial"] or time.monotonic() - state["opened_at"] < self.reset_timeout:
+                return False
+            state["trial"] = threading.get_ident()  # the thread making the trial call
+            return True
+    
+    def record_success(self, endpoint: str) -> None:
+        with self.lock:
+            self.states.pop(endpoint, None)
+    
+    def record_failure(self, endpoint: str) -> bool:
+        """Count a failure, returning True if this one tripped the breaker"""
+        with self.lock:
+            state = self.states.setdefault(endpoint, {"failures": 0, "opened_at": None, "trial": False})
+            state["failures"] += 1
+            if state["trial"] or (state["opened_at"] is None and state["failures"] >= self.failure_threshold):
+                self._open(state)
+                return True
+            return False
+    
+    def settle_trial(self, endpoint: str) -> None:
+        """Re-open the breaker if this thread's trial call ended without recording an outcome
+        
+        Called once every call is over, so an unexpected exception (or Ctrl+C) during the
+        trial counts as a failure instead of leaving the endpoint half-open for good.
+        """
+        with self.lock:
+            state = self.states.get(endpoint)
+            if state is not None and state["trial"] == threading.get_ident():
+                state["failures"] += 1
+                self._open(state)
+    
+    def _open(self, state: Dict[str, Any]) -> None:
+        state["opened_at"] = time.monotonic()
+        state["trial"] = False
+        self.trips += 1
+    
+    def is_open(self, endpoint: str) -> bool:
+        with self.lock:
+            state = self.states.get(endpoint)
+            return state is not None and state["opened_at"] is not None
+
+shared_circuit_breaker = CircuitBreaker()
+
+def normalize_params(params: Optional[Dict]) -> tuple:
+    """Canonical, hashable form of query params (key order and id order don't matter)"""
+    if not params:
+        return ()
+    items = []
+    for key, value in sorted(params.items()):
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        value = str(value)
+        if key == "ids":
+            value = ",".join(sorted(part.strip() for part in value.split(",") if part.strip()))
+        items.append((key, value))
+    return tuple(items)
+
+def load_json_decoder() -> Tuple[str, Callable[[Union[bytes, str]], Any]]:
+    """Pick the fastest JSON decoder installed: orjson when present, else the stdlib"""
+    try:
+        import orjson  # optional; its JSONDecodeError subclasses json.JSONDecodeError
+    except ImportError:
+        return "json", json.loads
+    return "orjson", orjson.loads
+
+json_backend, json_loads = load_json_decoder()
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Decode a top-level JSON array incrementally, yielding each element once it is complete
+    
+    Only the unparsed tail of the body is buffered, so a large array never exists
+    as a whole string or list. Raises ValueError on malformed or truncated input.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer, pos, eof = "", 0, False
+    expect = "["
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, got {char!r}")
+                pos += 1
+                expect = "first"
+                continue
+            if char == "]" and expect in ("first", ","):
+                return
+            if expect == ",":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' at offset {pos}, got {char!r}")
+                pos += 1
+                expect = "value"
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            # A bare number or literal is only complete once a delimiter follows it
+            if end is not None and (eof or buffer[end - 1] in '"]}'
+                                    or (end < len(buffer) and buffer[end] in " \t\r\n,]")):
+                yield item
+                pos = end
+                expect = ","
+                continue
+        if eof:
+            raise ValueError("JSON array ended early")
+        chunk = next(chunks, None)
+        buffer, pos = buffer[pos:], 0
+        if chunk is None:
+            eof = True
+            buffer += utf8.decode(b"", final=True)
+        else:
+            buffer += utf8.decode(chunk)
+
+class ResponseCache:
+    """Thread-safe in-memory response cache with per-endpoint TTLs and LRU eviction"""
+    DEFAULT_TTLS = {
+        "/simple/price": 30,
+        "/coins/markets": 60,
+        "/search": 24 * 60 * 60,
+        "/coins/list": 0,  # persisted by CoinIndex instead
+    }
+    
+    def __init__(self, max_entries: int = 256, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 30):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()  # key -> (expires_at, data)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def ttl_for(self, endpoint: str) -> float:
+        """TTL in seconds for an endpoint"""
+        return self.ttls.get(endpoint, self.default_ttl)
+    
+    def get(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Any]:
+        """Return a fresh cached response, or None on a miss"""
+        key = (endpoint, normalize_params(params))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, data = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return data
+                del self.entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, endpoint: str, params: Optional[Dict], data: Any,
+            ttl: Optional[float] = None) -> None:
+        """Store a response, evicting the least recently used entries past the limit"""
+        if ttl is None:
+            ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        key = (endpoint, normalize_params(params))
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Drop every cached response"""
+        with self.lock:
+            self.entries.clear()
+    
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Hit/miss counters and current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+            }
+
+# Shared so the short-lived trackers created per CLI action still reuse responses
+shared_response_cache = ResponseCache()
+
+class DiskCache:
+    """SQLite-backed response cache that survives restarts, with size limits and compaction
+    
+    Reads never write: hits only note their access time in memory, and those times go to
+    disk with the next stored response. Compaction runs on a background thread.
+    """
+    def __init__(self, path: str = "coingecko_cache.db", max_bytes: int = 20 * 1024 * 1024,
+                 max_entries: int = 5000, compact_every: int = 100):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.compact_every = compact_every
+        self.connection = None
+        self.lock = threading.Lock()
+        self.writes_since_compact = 0
+        self.accessed = {}  # key -> last hit time, not yet written to last_access
+        self.compaction_thread = None
+        self.hits = 0
+        self.misses = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            if self.path != ":memory:":
+                # WAL lets the CLI and the dashboard read while the other one writes
+                self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " endpoint TEXT NOT NULL,"
+                " body TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self.connection.commit()
+        return self.connection
+    
+    @staticmethod
+    def _key(endpoint: str, params: Optional[Dict]) -> str:
+        return json.dumps([endpoint, normalize_params(params)])
+    
+    def get(self, endpoint: str, params: Optional[Dict] = None) -> Optional[tuple]:
+        """Return (data, seconds_left) for a fresh entry, or None on a miss"""
+        key = self._key(endpoint, params)
+        now = time.time()
+        try:
+            with self.lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[1] <= now:
+                    self.misses += 1
+                    return None
+                self.accessed[key] = now
+                self.hits += 1
+            return json_loads(row[0]), row[1] - now
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            print(f"Disk cache read error: {e}")
+            return None
+    
+    def set(self, endpoint: str, params: Optional[Dict], data: Any, ttl: float) -> None:
+        """Store a response with its fetch time and TTL"""
+        if ttl <= 0:
+            return
+        key = self._key(endpoint, params)
+        body = json.dumps(data, separators=(",", ":"))
+        now = time.time()
+        try:
+            with self.lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, endpoint, body, len(body), now, now + ttl, now)
+                )
+                self.accessed.pop(key, None)
+                self._write_accesses(connection)
+                connection.commit()
+                self.writes_since_compact += 1
+                if self.writes_since_compact >= self.compact_every:
+                    self._compact_in_background()
+        except sqlite3.Error as e:
+            print(f"Disk cache write error: {e}")
+    
+    def _write_accesses(self, connection: sqlite3.Connection) -> None:
+        """Add the pending hit times to the current transaction"""
+        if self.accessed:
+            connection.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                   [(accessed_at, key) for key, accessed_at in self.accessed.items()])
+            self.accessed.clear()
+    
+    def _compact_in_background(self) -> None:
+        """Start compact() on its own thread, unless one is already running"""
+        self.writes_since_compact = 0
+        if self.compaction_thread is None or not self.compaction_thread.is_alive():
+            self.compaction_thread = threading.Thread(target=self.compact, name="disk-cache-compact", daemon=True)
+            self.compaction_thread.start()
+    
+    def compact(self) -> None:
+        """Drop expired entries, trim to the size limits, then try to give the space back
+        
+        Failures are left for the next compaction: a shrinking cache is an optimization,
+        not something to report while the user is looking at prices.
+        """
+        try:
+            with self.lock:
+                connection = self._connect()
+                self._write_accesses(connection)
+                removed = self._compact(connection)
+        except sqlite3.Error:
+            return
+        if removed and self.path != ":memory:":
+            self._vacuum()
+    
+    def _vacuum(self) -> None:
+        # Its own connection, so the cache stays usable meanwhile; under WAL, VACUUM fails
+        # while another process is reading, and then simply waits for the next compaction
+        try:
+            connection = sqlite3.connect(self.path, timeout=1)
+            try:
+                connection.execute("VACUUM")
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            pass
+    
+    def _compact(self, connection: sqlite3.Connection) -> int:
+        """Delete expired and least recently used entries, returning how many went"""
+        removed = connection.execute(
+            "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        count, total = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        # Evict least recently used entries until both limits are met
+        rows = connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall() if count > self.max_entries or total > self.max_bytes else []
+        stale_keys = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            count -= 1
+            total -= size
+        if stale_keys:
+            connection.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+            removed += len(stale_keys)
+        connection.commit()
+        return removed
+    
+    def clear(self) -> None:
+        """Drop every stored response"""
+        try:
+            with self.lock:
+                connection = self._connect()
+                connection.execute("DELETE FROM responses")
+                connection.commit()
+                self.accessed.clear()
+        except sqlite3.Error as e:
+            print(f"Disk cache error: {e}")
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and on-disk size"""
+        try:
+            with self.lock:
+                count, total = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        except sqlite3.Error:
+            count, total = 0, 0
+        return {"hits": self.hits, "misses": self.misses, "entries": count, "bytes": total}
+
+# Opened lazily, so importing the module never touches the disk
+shared_disk_cache = DiskCache()
+
+class SingleFlight:
+    """Coalesces identical in-flight calls: followers wait for the leader's result
+    
+    Callers are threads (AsyncCoinGeckoAPI runs requests on worker threads too), so
+    waiting never blocks an event loop.
+    """
+    class _Call:
+        __slots__ = ("done", "result", "error")
+        
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+    
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+    
+    def do(self, key: Any, func: Callable, *args) -> Any:
+        """Run func(*args) once per key at a time, sharing its result with concurrent callers"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self.calls[key] = self._Call()
+                self.executed += 1
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func(*args)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+        
+        if call.error is not None:
+            raise call.error
+        return call.result
+    
+    def stats(self) -> Dict[str, int]:
+        """How many calls ran and how many piggybacked on one already in flight"""
+        with self.lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self.calls)}
+
+shared_single_flight = SingleFlight()
+
+class ApiMetrics:
+    """Thread-safe per-endpoint request counters and latency histograms"""
+    # Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+    latency_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
     def __init__(self):
-        self.base_url = "https://api.coingecko.com/api/v3"
+        self.lock = threading.Lock()
+        self.endpoints = {}
+    
+    def _endpoint(self, endpoint: str) -> Dict[str, Any]:
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = {
+                "calls": 0,
+                "errors": 0,
+                "statuses": {},
+                "rejected": 0,
+                "bytes": 0,
+                "rate_wait_seconds": 0.0,
+                "latency_sum": 0.0,
+                "latency_max": 0.0,
+                "latency_buckets": [0] * (len(self.latency_buckets) + 1),
+                "decode_seconds": 0.0,
+                "cache": {"memory": 0, "disk": 0, "miss": 0},
+            }
+        return metrics
+    
+    def record_response(self, endpoint: str, status: Union[int, str], seconds: float, size: int) -> None:
+        """One HTTP attempt: status code (or "error" when no response came back), latency, wire bytes"""
+        bucket = len(self.latency_buckets)
+        for i, bound in enumerate(self.latency_buckets):
+            if seconds <= bound:
+                bucket = i
+                break
+        with self.lock:
+            metrics = self._endpoint(endpoint)
+            metrics["calls"] += 1
+            if status == "error" or status >= 400:
+                metrics["errors"] += 1
+            key = str(status)
+            metrics["statuses"][key] = metrics["statuses"].get(key, 0) + 1
+            metrics["bytes"] += size
+            metrics["latency_sum"] += seconds
+            metrics["latency_max"] = max(metrics["latency_max"], seconds)
+            metrics["latency_buckets"][bucket] += 1
+    
+    def record_error(self, endpoint: str) -> None:
+        """A failure after the response arrived, such as an undecodable body"""
+        with self.lock:
+            self._endpoint(endpoint)["errors"] += 1
+    
+    def record_rejected(self, endpoint: str) -> None:
+        with self.lock:
+            self._endpoint(endpoint)["rejected"] += 1
+    
+    def record_bytes(self, endpoint: str, size: int) -> None:
+        with self.lock:
+            self._endpoint(endpoint)["bytes"] += size
+    
+    def record_rate_wait(self, endpoint: str, seconds: float) -> None:
+        if seconds > 0:
+            with self.lock:
+                self._endpoint(endpoint)["rate_wait_seconds"] += seconds
+    
+    def record_decode(self, endpoint: str, seconds: float) -> None:
+        with self.lock:
+            self._endpoint(endpoint)["decode_seconds"] += seconds
+    
+    def record_cache(self, endpoint: str, result: str) -> None:
+        """A lookup answered from "memory", "disk", or a "miss" that went upstream"""
+        with self.lock:
+            self._endpoint(endpoint)["cache"][result] += 1
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint copy of every counter, plus derived averages and hit ratio"""
+        with self.lock:
+            snapshot = {}
+            for endpoint, metrics in self.endpoints.items():
+                cache = dict(metrics["cache"])
+                lookups = sum(cache.values())
+                snapshot[endpoint] = {
+                    "calls": metrics["calls"],
+                    "errors": metrics["errors"],
+                    "statuses": dict(metrics["statuses"]),
+                    "rejected": metrics["rejected"],
+                    "bytes": metrics["bytes"],
+                    "rate_wait_seconds": metrics["rate_wait_seconds"],
+                    "latency_avg": metrics["latency_sum"] / metrics["calls"] if metrics["calls"] else 0.0,
+                    "latency_max": metrics["latency_max"],
+                    "latency_sum": metrics["latency_sum"],
+                    "latency_buckets": dict(zip([str(bound) for bound in self.latency_buckets] + ["+Inf"],
+                                                metrics["latency_buckets"])),
+                    "decode_seconds": metrics["decode_seconds"],
+                    "cache": cache,
+                    "cache_hit_ratio": (cache["memory"] + cache["disk"]) / lookups if lookups else 0.0,
+                }
+            return snapshot
+    
+    def prometheus(self, prefix: str = "coingecko") -> str:
+        """The counters in Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}")
+        
+        family("requests_total", "counter", "HTTP attempts by endpoint and status code",
+               [("", (("endpoint", endpoint), ("code", code)), count)
+                for endpoint, metrics in snapshot.items() for code, count in metrics["statuses"].items()])
+        family("errors_total", "counter", "Failed attempts (HTTP errors, network errors, bad JSON)",
+               [("", (("endpoint", endpoint),), metrics["errors"]) for endpoint, metrics in snapshot.items()])
+        family("rejected_total", "counter", "Requests refused by the open circuit breaker",
+               [("", (("endpoint", endpoint),), metrics["rejected"]) for endpoint, metrics in snapshot.items()])
+        family("response_bytes_total", "counter", "Bytes received over the wire",
+               [("", (("endpoint", endpoint),), metrics["bytes"]) for endpoint, metrics in snapshot.items()])
+        family("rate_limit_wait_seconds_total", "counter", "Time spent waiting for the rate limiter",
+               [("", (("endpoint", endpoint),), metrics["rate_wait_seconds"])
+                for endpoint, metrics in snapshot.items()])
+        family("decode_seconds_total", "counter", "Time spent decoding JSON bodies",
+               [("", (("endpoint", endpoint),), metrics["decode_seconds"]) for endpoint, metrics in snapshot.items()])
+        family("cache_lookups_total", "counter", "Lookups by where they were answered",
+               [("", (("endpoint", endpoint), ("result", result)), count)
+                for endpoint, metrics in snapshot.items() for result, count in metrics["cache"].items()])
+        family("cache_hit_ratio", "gauge", "Share of lookups answered from memory or disk",
+               [("", (("endpoint", endpoint),), metrics["cache_hit_ratio"]) for endpoint, metrics in snapshot.items()])
+        
+        histogram = []
+        for endpoint, metrics in snapshot.items():
+            cumulative = 0
+            for bound, count in metrics["latency_buckets"].items():
+                cumulative += count
+                histogram.append(("_bucket", (("endpoint", endpoint), ("le", bound)), cumulative))
+            histogram.append(("_sum", (("endpoint", endpoint),), metrics["latency_sum"]))
+            histogram.append(("_count", (("endpoint", endpoint),), metrics["calls"]))
+        family("request_duration_seconds", "histogram", "HTTP attempt latency", histogram)
+        return "\n".join(lines) + "\n"
+
+def wire_bytes(response: requests.Response) -> int:
+    """Bytes read off the socket for a response (compressed size when gzip was used)"""
+    try:
+        return int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        pass
+    length = response.headers.get("Content-Length", "")
+    if length.isdigit():
+        return int(length)
+    return len(response.content or b"")
+
+class CoinQuote:
+    """Compact quote record parsed once from a provider payload, holding only the fields we show"""
+    __slots__ = ("id", "name", "symbol", "rank", "price", "change_24h", "market_cap")
+    
+    def __init__(self, coin_id: str, name: str = "N/A", symbol: str = "N/A", rank: Optional[int] = None,
+                 price: Optional[float] = None, change_24h: Optional[float] = None,
+                 market_cap: Optional[float] = None):
+        self.id = coin_id
+        self.name = name
+        self.symbol = symbol
+        self.rank = rank
+        self.price = price
+        self.change_24h = change_24h
+        self.market_cap = market_cap
+    
+    @staticmethod
+    def _number(value: Any) -> Optional[Union[int, float]]:
+        """Numbers pass through; anything else (None, strings, bools) becomes None"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        return None
+    
+    @classmethod
+    def from_market(cls, coin: Dict) -> "CoinQuote":
+        """Parse one /coins/markets entry"""
+        number = cls._number
+        return cls(coin.get("id") or "",
+                   str(coin.get("name") or "N/A"),
+                   str(coin.get("symbol") or "N/A").upper(),
+                   number(coin.get("market_cap_rank")),
+                   number(coin.get("current_price")),
+                   number(coin.get("price_change_percentage_24h")),
+                   number(coin.get("market_cap")))
+    
+    @classmethod
+    def from_price(cls, coin_id: str, data: Dict, vs_currency: str = "usd") -> "CoinQuote":
+        """Parse one /simple/price entry"""
+        number = cls._number
+        return cls(coin_id,
+                   price=number(data.get(vs_currency)),
+                   change_24h=number(data.get(f"{vs_currency}_24h_change")),
+                   market_cap=number(data.get(f"{vs_currency}_market_cap")))
+    
+    def to_row(self) -> List:
+        """Plain JSON form, for the disk cache"""
+        return [self.id, self.name, self.symbol, self.rank, self.price, self.change_24h, self.market_cap]
+    
+    @classmethod
+    def from_row(cls, row: List) -> "CoinQuote":
+        if not isinstance(row, list):
+            raise TypeError(f"not a quote row: {row!r}")
+        return cls(*row)
+    
+    def price_entry(self, vs_currency: str = "usd") -> Dict:
+        """This quote in /simple/price form"""
+        return {vs_currency: self.price,
+                f"{vs_currency}_market_cap": self.market_cap,
+                f"{vs_currency}_24h_change": self.change_24h}
+    
+    def market_entry(self) -> Dict:
+        """This quote in /coins/markets form, with only the fields a quote keeps"""
+        return {"id": self.id, "name": self.name, "symbol": self.symbol.lower(),
+                "market_cap_rank": self.rank, "current_price": self.price,
+                "price_change_percentage_24h": self.change_24h, "market_cap": self.market_cap}
+    
+    def price_text(self) -> str:
+        return f"${self.price:,.2f}" if self.price is not None else "N/A"
+    
+    def change_text(self) -> str:
+        return f"{self.change_24h:+.2f}%" if self.change_24h is not None else "N/A"
+    
+    def __repr__(self) -> str:
+        return f"CoinQuote({self.id!r}, price={self.price!r}, change_24h={self.change_24h!r})"
+
+def parse_quotes(endpoint: str, params: Optional[Dict], data: Any) -> Any:
+    """Price and market payloads as CoinQuote records; other endpoints' payloads unchanged
+    
+    Responses are parsed once, as they arrive, so the caches hold each coin as one
+    quote instead of the provider's full dict. Callers share those records with the
+    caches, so they are read-only.
+    """
+    if endpoint == "/simple/price" and isinstance(data, dict):
+        vs_currency = (params or {}).get("vs_currencies", "usd")
+        return {coin_id: CoinQuote.from_price(coin_id, entry, vs_currency)
+                for coin_id, entry in data.items() if isinstance(entry, dict)}
+    if endpoint == "/coins/markets" and isinstance(data, list):
+        return [CoinQuote.from_market(coin) for coin in data if isinstance(coin, dict)]
+    return data
+
+def quotes_to_rows(endpoint: str, data: Any) -> Any:
+    """parse_quotes output in plain JSON form, for the disk cache"""
+    if endpoint == "/simple/price":
+        return {coin_id: quote.to_row() for coin_id, quote in data.items()}
+    if endpoint == "/coins/markets":
+        return [quote.to_row() for quote in data]
+    return data
+
+def quotes_from_rows(endpoint: str, data: Any) -> Any:
+    """The inverse of quotes_to_rows; raises TypeError or ValueError on any other shape"""
+    if endpoint == "/simple/price":
+        return {coin_id: CoinQuote.from_row(row) for coin_id, row in data.items()}
+    if endpoint == "/coins/markets":
+        return [CoinQuote.from_row(row) for row in data]
+    return data
+
+def connections_opened(adapter: HTTPAdapter) -> int:
+    """TCP/TLS connections the adapter's pools have opened, from urllib3's public per-pool counter
+    
+    A pool dropped from the manager (more hosts than pool_connections) stops counting.
+    """
+    pools = adapter.poolmanager.pools
+    total = 0
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is not None:
+            total += pool.num_connections
+    return total
+
+class CoinGeckoAPI:
+    # /simple/price limits: ids per request, and length of the joined ids value
+    # (keeps the full URL well under the ~8 KB most servers and proxies accept)
+    max_ids_per_request = 250
+    max_ids_length = 4000
+    # /coins/markets page size cap
+    max_per_page = 250
+    # Responses worth retrying: throttling and transient server errors
+    retry_statuses = {429, 500, 502, 503, 504}
+    max_retry_after = 120.0
+    default_base_url = "https://api.coingecko.com/api/v3"
+    
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[ResponseCache] = None,
+                 disk_cache: Optional[DiskCache] = None,
+                 max_concurrency: int = 5,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 single_flight: Optional[SingleFlight] = None,
+                 connect_timeout: float = 5.0, read_timeout: float = 20.0,
+                 json_decoder: Optional[Callable[[bytes], Any]] = None,
+                 base_url: Optional[str] = None,
+                 metrics: Optional[ApiMetrics] = None):
+        # COINGECKO_BASE_URL points every client at a mirror or the local emulator
+        self.base_url = (base_url or os.environ.get("COINGECKO_BASE_URL") or self.default_base_url).rstrip("/")
+        # Enough pooled connections for chunk fan-out, page prefetch and async callers at once
+        self.pool_size = max(10, max_concurrency * 2)
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
         self.session = requests.Session()
-        self.rate_limit_delay = 2.0  # CoinGecko free tier: 50 calls/minute (increased for safety)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        # requests already asks for every encoding urllib3 can decode here (gzip, deflate, br)
+        self.session.headers.update({"Accept": "application/json"})
+        self.timeout = (connect_timeout, read_timeout)
+        self.requests_sent = 0
+        self.compressed_responses = 0
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        if self.base_url == self.default_base_url:
+            self.cache = cache if cache is not None else shared_response_cache
+            self.disk_cache = disk_cache if disk_cache is not None else shared_disk_cache
+        else:
+            # Another upstream's answers must not leak into the caches for the real API
+            self.cache = cache if cache is not None else ResponseCache()
+            self.disk_cache = disk_cache if disk_cache is not None else DiskCache(":memory:")
+        self.max_concurrency = max_concurrency
+        self.circuit_breaker = circuit_breaker or shared_circuit_breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.counters_lock = threading.Lock()
+        self.retries = 0
+        self.breaker_rejections = 0
+        self.backoff_seconds = 0.0
+        self.single_flight = single_flight or shared_single_flight
+        self.json_decoder = json_decoder or json_loads
+        self.metrics = metrics or ApiMetrics()
+    
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before retry `attempt` (0-based), honoring Retry-After on 429"""
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    try:
+                        delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    except (TypeError, ValueError):
+                        delay = None
+                if delay is not None:
+                    return min(max(delay, 0.0), self.max_retry_after)
+        # Exponential backoff with equal jitter, so parallel callers don't retry in lockstep
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+    
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> None:
+        delay = self._retry_delay(attempt, response)
+        with self.counters_lock:
+            self.retries += 1
+            self.backoff_seconds += delay
+        if response is not None and response.status_code == 429:
+            # Throttled: hold back every caller sharing the budget, not just this one.
+            # The retry then waits in rate_limiter.acquire() like everyone else.
+            self.rate_limiter.pause(delay)
+        else:
+            time.sleep(delay)
+    
+    def connection_stats(self) -> Dict[str, int]:
+        """How many HTTP requests reused a pooled connection instead of a new handshake"""
+        with self.counters_lock:
+            requests_sent = self.requests_sent
+            compressed = self.compressed_responses
+        opened = connections_opened(self.adapter)
+        return {
+            "requests": requests_sent,
+            "connections_opened": opened,
+            "connections_reused": max(requests_sent - opened, 0),
+            "compressed_responses": compressed,
+            "pool_size": self.pool_size,
+        }
+    
+    def retry_stats(self) -> Dict[str, Union[int, float]]:
+        """Retry, circuit breaker and backoff counters"""
+        with self.counters_lock:
+            return {
+                "retries": self.retries,
+                "backoff_seconds": self.backoff_seconds,
+                "breaker_trips": self.circuit_breaker.trips,
+                "breaker_rejections": self.breaker_rejections,
+            }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint metrics plus the client-wide rate limiter, connection, retry and cache counters"""
+        return {
+            "endpoints": self.metrics.snapshot(),
+            "rate_limiter": {
+                "total_wait_seconds": self.rate_limiter.total_wait,
+                "available": self.rate_limiter.available(),
+            },
+            "connections": self.connection_stats(),
+            "retries": self.retry_stats(),
+            "cache": self.cache.stats(),
+            "disk_cache": self.disk_cache.stats(),
+            "single_flight": self.single_flight.stats(),
+        }
         
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
-        """Make API request with rate limiting and error handling"""
+        """Make API request with caching, rate limiting, retries and error handling"""
+        ids = params.get("ids") if params else None
+        with tracer.span("api.request", endpoint=endpoint, ids=ids.count(",") + 1 if ids else 0) as span:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                self.metrics.record_cache(endpoint, "memory")
+                span.set(cache="memory", rows=len(cached))
+                return cached
+            
+            # An identical request already in flight (from any thread) answers this one too
+            key = (self.base_url, endpoint, normalize_params(params))
+            data = self.single_flight.do(key, self._fetch, endpoint, params)
+            span.set(rows=len(data) if data is not None else 0)
+            return data
+    
+    def _fetch(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """Answer a memory-cache miss from disk or the network"""
+        stored = self.disk_cache.get(endpoint, params)
+        if stored is not None:
+            rows, ttl_left = stored
+            try:
+                data = quotes_from_rows(endpoint, rows)
+            except (TypeError, ValueError, AttributeError):
+                data = None  # written in an older format; refetch
+            if data is not None:
+                self.cache.set(endpoint, params, data, ttl=ttl_left)
+                self.metrics.record_cache(endpoint, "disk")
+                tracer.annotate(cache="disk")
+                return data
+        
+        self.metrics.record_cache(endpoint, "miss")
+        tracer.annotate(cache="miss")
+        data = self._request(endpoint, params)
+        if data is not None:
+            data = parse_quotes(endpoint, params, data)
+            ttl = self.cache.ttl_for(endpoint)
+            self.cache.set(endpoint, params, data, ttl=ttl)
+            self.disk_cache.set(endpoint, params, quotes_to_rows(endpoint, data), ttl)
+        return data
+    
+    def _request(self, endpoint: str, params: Optional[Dict] = None, stream: bool = False) -> Any:
+        """Send one GET through the circuit breaker, rate limiter and retry loop
+        
+        Returns the decoded body, or with stream=True the open response with its body
+        still unread. Returns None on failure.
+        """
+        if not self.circuit_breaker.allow(endpoint):
+            with self.counters_lock:
+                self.breaker_rejections += 1
+            self.metrics.record_rejected(endpoint)
+            print(f"API request skipped: {endpoint} is failing, try again shortly")
+            return None
+        
         url = f"{self.base_url}{endpoint}"
         
         try:
-            time.sleep(self.rate_limit_delay)
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"API request failed: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {e}")
+            for attempt in range(self.max_retries + 1):
+                can_retry = attempt < self.max_retries
+                try:
+                    with tracer.span("rate_limit.wait"):
+                        self.metrics.record_rate_wait(endpoint, self.rate_limiter.acquire())
+                    with self.counters_lock:
+                        self.requests_sent += 1
+                    started = time.perf_counter()
+                    with tracer.span("http.get", endpoint=endpoint, attempt=attempt + 1, stream=stream) as span:
+                        response = self.session.get(url, params=params, timeout=self.timeout, stream=stream)
+                        size = 0 if stream else wire_bytes(response)
+                        span.set(status=response.status_code, bytes=size)
+                    self.metrics.record_response(endpoint, response.status_code, time.perf_counter() - started, size)
+                    if response.headers.get("Content-Encoding"):
+                        with self.counters_lock:
+                            self.compressed_responses += 1
+                    if response.status_code in self.retry_statuses and can_retry:
+                        response.close()
+                        self._backoff(attempt, response)
+                        continue
+                    response.raise_for_status()
+                    if stream:
+                        self.circuit_breaker.record_success(endpoint)
+                        return response
+                    decode_started = time.perf_counter()
+                    with tracer.span("json.decode", endpoint=endpoint):
+                        data = self.json_decoder(response.content)
+                    self.metrics.record_decode(endpoint, time.perf_counter() - decode_started)
+                    self.circuit_breaker.record_success(endpoint)
+                    return data
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    self.metrics.record_response(endpoint, "error", time.perf_counter() - started, 0)
+                    if can_retry:
+                        self._backoff(attempt)
+                        continue
+                    self.circuit_breaker.record_failure(endpoint)
+                    print(f"API request failed: {e}")
+                    return None
+                except requests.exceptions.RequestException as e:
+                    status = getattr(e.response, "status_code", None)
+                    if status is None:
+                        # No status at all (a truncated or undecodable body): transient, like a dropped connection
+                        self.metrics.record_response(endpoint, "error", time.perf_counter() - started, 0)
+                        if can_retry:
+                            self._backoff(attempt)
+                            continue
+                        self.circuit_breaker.record_failure(endpoint)
+                        print(f"API request failed: {e}")
+                        return None
+                    # Only throttling and server errors count against upstream health
+                    if status in self.retry_statuses:
+                        self.circuit_breaker.record_failure(endpoint)
+                    else:
+                        self.circuit_breaker.record_success(endpoint)
+                    print(f"API request failed: {e}")
+                    return None
+                except ValueError as e:
+                    # Any decoder failure, including non-UTF-8 bytes and pluggable decoders' errors
+                    self.metrics.record_error(endpoint)
+                    self.circuit_breaker.record_failure(endpoint)
+                    print(f"JSON decode error: {e}")
+                    return None
             return None
+        finally:
+            self.circuit_breaker.settle_trial(endpoint)
+    
+    def stream_array(self, endpoint: str, params: Optional[Dict] = None) -> Iterator[Any]:
+        """Yield the elements of a JSON array response as they arrive (bypasses the caches)
+        
+        Raises requests.RequestException or ValueError if the body breaks off mid-stream,
+        since a partial array can't be told apart from a short one.
+        """
+        response = self._request(endpoint, params, stream=True)
+        if response is None:
+            return
+        try:
+            yield from iter_json_array(response.iter_content(chunk_size=64 * 1024))
+        except (requests.exceptions.RequestException, ValueError):
+            self.metrics.record_error(endpoint)
+            self.circuit_breaker.record_failure(endpoint)
+            raise
+        finally:
+            self.metrics.record_bytes(endpoint, wire_bytes(response))
+            response.close()
     
     def get_coin_price(self, coin_id: str, vs_currency: str = "usd") -> Optional[Dict]:
-        """Get current price for a single coin"""
-        endpoint = "/simple/price"
-        params = {
-            "ids": coin_id,
-            "vs_currencies": vs_currency,
-            "include_market_cap": True,
-            "include_24hr_change": True
-        }
-        return self._make_request(endpoint, params)
+        """Get current price for a single coin, in /simple/price form"""
+        quotes = self._get_prices_chunk([coin_id], vs_currency)
+        if quotes is None:
+            return None
+        return {quote_id: quote.price_entry(vs_currency) for quote_id, quote in quotes.items()}
     
     def get_multiple_coin_prices(self, coin_ids: List[str], vs_currency: str = "usd") -> Optional[Dict]:
-        """Get current prices for multiple coins"""
+        """Get current prices for multiple coins in /simple/price form, from whatever chunks succeeded"""
+        quotes = self.get_price_quotes(coin_ids, vs_currency)
+        if quotes is None:
+            return None
+        return {coin_id: quote.price_entry(vs_currency) for coin_id, quote in quotes.items()}
+    
+    def get_price_quotes(self, coin_ids: List[str], vs_currency: str = "usd") -> Optional[Dict[str, CoinQuote]]:
+        """Get current prices for multiple coins as {coin_id: CoinQuote}"""
+        quotes, failed_ids = self.get_multiple_coin_prices_report(coin_ids, vs_currency)
+        if failed_ids:
+            print(f"Failed to fetch prices for {len(failed_ids)} of {len(coin_ids)} coins")
+        if not quotes and failed_ids:
+            return None
+        return quotes
+    
+    def get_multiple_coin_prices_report(self, coin_ids: List[str],
+                                        vs_currency: str = "usd") -> Tuple[Dict[str, CoinQuote], List[str]]:
+        """Get prices for any number of coins, split into concurrent chunks
+        
+        Returns ({coin_id: CoinQuote} for every chunk that succeeded, ids whose chunk failed).
+        """
+        chunks = self.chunk_ids(coin_ids)
+        if len(chunks) <= 1 or self.max_concurrency <= 1:
+            results = [self._get_prices_chunk(chunk, vs_currency) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), self.max_concurrency)) as executor:
+                results = list(executor.map(tracer.propagate(lambda chunk: self._get_prices_chunk(chunk, vs_currency)),
+                                            chunks))
+        
+        price_data = {}
+        failed_ids = []
+        for chunk, result in zip(chunks, results):
+            if result is None:
+                failed_ids.extend(chunk)
+            else:
+                price_data.update(result)
+        return price_data, failed_ids
+    
+    def chunk_ids(self, coin_ids: List[str]) -> List[List[str]]:
+        """Split unique ids into chunks that fit the id-count and URL-length limits"""
+        chunks = []
+        chunk, length = [], 0
+        for coin_id in dict.fromkeys(coin_ids):
+            extra = len(coin_id) + (1 if chunk else 0)
+            if chunk and (len(chunk) >= self.max_ids_per_request or length + extra > self.max_ids_length):
+                chunks.append(chunk)
+                chunk, extra, length = [], len(coin_id), 0
+            chunk.append(coin_id)
+            length += extra
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+    
+    def _get_prices_chunk(self, coin_ids: List[str], vs_currency: str) -> Optional[Dict[str, CoinQuote]]:
+        """Fetch prices for one chunk of ids"""
         endpoint = "/simple/price"
         params = {
             "ids": ",".join(coin_ids),
@@ -51,50 +1161,1421 @@ class CoinGeckoAPI:
         return self._make_request(endpoint, params)
     
     def get_top_coins(self, limit: int = 100, vs_currency: str = "usd") -> Optional[List]:
-        """Get top coins by market cap"""
-        endpoint = "/coins/markets"
-        params = {
+        """Get top coins by market cap, in /coins/markets form"""
+        return [quote.market_entry() for quote in self.iter_top_quotes(limit, vs_currency)] or None
+    
+    def iter_top_coins(self, limit: int = 100, vs_currency: str = "usd") -> Iterator[Dict]:
+        """Like iter_top_quotes, but yields /coins/markets-style dicts"""
+        for quote in self.iter_top_quotes(limit, vs_currency):
+            yield quote.market_entry()
+    
+    def _iter_top_pages(self, limit: int, vs_currency: str) -> Iterator[CoinQuote]:
+        """Yield the top coins page by page, fetching the next page while this one is consumed"""
+        per_page = max(1, min(limit, self.max_per_page))
+        last_page = (limit + per_page - 1) // per_page
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="coingecko-prefetch")
+        try:
+            upcoming = executor.submit(tracer.propagate(self._get_markets_page), 1, per_page, vs_currency)
+            remaining = limit
+            for page in range(1, last_page + 1):
+                coins = upcoming.result()
+                if page < last_page and coins and len(coins) >= per_page:
+                    upcoming = executor.submit(tracer.propagate(self._get_markets_page), page + 1, per_page, vs_currency)
+                else:
+                    upcoming = None
+                for coin in (coins or [])[:remaining]:
+                    yield coin
+                remaining -= len(coins or [])
+                if upcoming is None:
+                    break
+        finally:
+            executor.shutdown(wait=False)
+    
+    def iter_top_quotes(self, limit: int = 100, vs_currency: str = "usd",
+                        stream: bool = False) -> Iterator[CoinQuote]:
+        """Yield the top coins by market cap as CoinQuote records
+        
+        With stream=True each page is parsed straight off the socket into quotes,
+        without caching and without building the page's dicts as a list first.
+        """
+        if not stream:
+            yield from self._iter_top_pages(limit, vs_currency)
+            return
+        
+        per_page = max(1, min(limit, self.max_per_page))
+        remaining = limit
+        page = 1
+        while remaining > 0:
+            received = 0
+            try:
+                for coin in self.stream_array("/coins/markets", self._markets_params(page, per_page, vs_currency)):
+                    received += 1
+                    if isinstance(coin, dict) and received <= remaining:
+                        yield CoinQuote.from_market(coin)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"API request failed: {e}")
+                return
+            if received < per_page:
+                return
+            remaining -= received
+            page += 1
+    
+    def _markets_params(self, page: int, per_page: int, vs_currency: str) -> Dict:
+        return {
             "vs_currency": vs_currency,
             "order": "market_cap_desc",
-            "per_page": limit,
-            "page": 1,
+            "per_page": per_page,
+            "page": page,
             "sparkline": False
         }
-        return self._make_request(endpoint, params)
+    
+    def _get_markets_page(self, page: int, per_page: int, vs_currency: str) -> Optional[List[CoinQuote]]:
+        """Fetch one page of /coins/markets"""
+        endpoint = "/coins/markets"
+        return self._make_request(endpoint, self._markets_params(page, per_page, vs_currency))
     
     def search_coin(self, query: str) -> Optional[Dict]:
         """Search for a coin by name or symbol"""
         endpoint = "/search"
         params = {"query": query}
         return self._make_request(endpoint, params)
+    
+    def get_coins_list(self) -> Optional[List]:
+        """Get every listed coin as {id, symbol, name}"""
+        endpoint = "/coins/list"
+        return self._make_request(endpoint)
+    
+    def iter_coins_list(self) -> Iterator[Dict]:
+        """Stream /coins/list entry by entry (see stream_array for error handling)"""
+        return self.stream_array("/coins/list")
 
-class CryptoPriceTracker:
+class CoinIndex:
+    """Local id/symbol/name index built from /coins/list and persisted to disk (unless index_file is None)"""
+    def __init__(self, index_file: Optional[str] = "coin_index_v2.json", max_age: float = 24 * 60 * 60,
+                 retry_interval: float = 15 * 60, check_interval: float = 10 * 60):
+        self.index_file = index_file
+        self.max_age = max_age
+        self.retry_interval = retry_interval  # minimum gap between rebuild attempts, so failures back off
+        self.check_interval = check_interval  # how often the keep_fresh() timer checks the age
+        self.by_id = {}       # id -> (symbol, name)
+        self.by_symbol = {}   # lowercase symbol -> ids, best first
+        self.by_name = {}     # lowercase name -> ids, best first
+        self.ranks = {}       # id -> market cap rank, for ranked coins only
+        self.built_at = 0.0
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.rebuild_thread = None
+        self.attempted_at = 0.0  # last rebuild start, successful or not
+        self.timer_thread = None
+    
+    def __len__(self) -> int:
+        return len(self.by_id)
+    
+    def _sort_key(self, coin_id: str) -> tuple:
+        # Symbol collisions: ranked coins first, then the shortest (least "wrapped-") id
+        return (self.ranks.get(coin_id, float("inf")), len(coin_id), coin_id)
+    
+    def _index(self, coins: List, ranks: Dict[str, int], built_at: float) -> None:
+        """Rebuild the lookup tables from [id, symbol, name] rows"""
+        by_id, by_symbol, by_name = {}, {}, {}
+        for coin_id, symbol, name in coins:
+            by_id[coin_id] = (symbol, name)
+            by_symbol.setdefault(symbol.lower(), []).append(coin_id)
+            by_name.setdefault(name.lower(), []).append(coin_id)
+        self.ranks = ranks
+        for table in (by_symbol, by_name):
+            for ids in table.values():
+                ids.sort(key=self._sort_key)
+        self.by_id, self.by_symbol, self.by_name = by_id, by_symbol, by_name
+        self.built_at = built_at
+    
+    def load(self) -> bool:
+        """Load the persisted index, returning True if one was found"""
+        with self.lock:
+            if self.loaded:
+                return bool(self.by_id)
+            self.loaded = True
+            if self.index_file is None or not os.path.exists(self.index_file):
+                return False
+            try:
+                with open(self.index_file, "r") as file:
+                    stored = json.load(file)
+                self._index(stored["coins"], stored.get("ranks", {}), stored.get("built_at", 0.0))
+                return True
+            except (json.JSONDecodeError, IOError, KeyError, ValueError) as e:
+                print(f"Error loading coin index: {e}")
+                return False
+    
+    def build(self, api: CoinGeckoAPI) -> bool:
+        """Download the full coin list (plus top-250 ranks) and persist a fresh index"""
+        # Streamed: rows are built as entries arrive instead of from a full parsed list
+        try:
+            coins = [[coin["id"], coin.get("symbol", ""), coin.get("name", "")]
+                     for coin in api.iter_coins_list() if isinstance(coin, dict) and coin.get("id")]
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error downloading coin list: {e}")
+            return False
+        if not coins:
+            return False
+        ranks = {}
+        for quote in api.iter_top_quotes(250):
+            if quote.id and isinstance(quote.rank, int):
+                ranks[quote.id] = quote.rank
+        built_at = time.time()
+        with self.lock:
+            self._index(coins, ranks, built_at)
+            self.loaded = True
+        if self.index_file is None:
+            return True
+        try:
+            temp_file = f"{self.index_file}.tmp"
+            with open(temp_file, "w") as file:
+                json.dump({"built_at": built_at, "ranks": ranks, "coins": coins}, file)
+            os.replace(temp_file, self.index_file)
+        except IOError as e:
+            print(f"Error saving coin index: {e}")
+        return True
+    
+    def is_stale(self) -> bool:
+        """True when the index is missing or older than max_age"""
+        return not self.by_id or time.time() - self.built_at > self.max_age
+    
+    def refresh_in_background(self, api: CoinGeckoAPI) -> None:
+        """Rebuild a stale index on a daemon thread; lookups keep using the old one
+        
+        At most one attempt per retry_interval, so an offline client or an open circuit
+        breaker doesn't start a new download on every call.
+        """
+        with self.lock:
+            if not self.is_stale() or time.time() - self.attempted_at < self.retry_interval:
+                return
+            if self.rebuild_thread is not None and self.rebuild_thread.is_alive():
+                return
+            self.attempted_at = time.time()
+            self.rebuild_thread = threading.Thread(target=self.build, args=(api,),
+                                                   name="coin-index-rebuild", daemon=True)
+            self.rebuild_thread.start()
+    
+    def keep_fresh(self, api: CoinGeckoAPI) -> None:
+        """Rebuild now if stale, then re-check every check_interval for the life of the process"""
+        self.refresh_in_background(api)
+        with self.lock:
+            if self.timer_thread is not None:
+                return
+            self.timer_thread = threading.Thread(target=self._check_periodically, args=(api,),
+                                                 name="coin-index-timer", daemon=True)
+            self.timer_thread.start()
+    
+    def _check_periodically(self, api: CoinGeckoAPI) -> None:
+        while True:
+            time.sleep(self.check_interval)
+            self.refresh_in_background(api)
+    
+    def lookup(self, query: str) -> Optional[str]:
+        """Resolve an id, symbol or name to a CoinGecko ID without any API call"""
+        key = query.strip().lower()
+        if not key:
+            return None
+        slug = key.replace(" ", "-")
+        matches = [(0, key if key in self.by_id else None),
+                   (1, slug if slug in self.by_id else None),
+                   (2, self.by_name.get(key, [None])[0]),
+                   (3, self.by_symbol.get(key, [None])[0])]
+        # Rank first, so a ranked coin's symbol beats an obscure coin whose id is the query
+        candidates = [(self.ranks.get(coin_id, float("inf")), priority, len(coin_id), coin_id)
+                      for priority, coin_id in matches if coin_id]
+        if not candidates:
+            return None
+        return min(candidates)[3]
+
+# One index per process; loaded from disk on first use
+shared_coin_index = CoinIndex()
+upstream_coin_indexes = {}  # base_url -> in-memory CoinIndex, for mirrors and the emulator
+upstream_coin_indexes_lock = threading.Lock()
+
+def coin_index_for(api: CoinGeckoAPI) -> CoinIndex:
+    """The persisted index for the real API, or an in-memory one per other upstream"""
+    if api.base_url == CoinGeckoAPI.default_base_url:
+        return shared_coin_index
+    with upstream_coin_indexes_lock:
+        if api.base_url not in upstream_coin_indexes:
+            upstream_coin_indexes[api.base_url] = CoinIndex(index_file=None)
+        return upstream_coin_indexes[api.base_url]
+
+class AsyncCoinGeckoAPI:
+    """Asyncio front-end for CoinGeckoAPI that runs independent requests concurrently"""
+    def __init__(self, api: Optional[CoinGeckoAPI] = None, max_concurrency: int = 5):
+        self.api = api or CoinGeckoAPI()
+        self.max_concurrency = max_concurrency
+        # The worker pool is the concurrency cap; the token bucket is the rate budget
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                           thread_name_prefix="coingecko")
+    
+    async def _run(self, func: Callable, *args) -> Any:
+        """Run a blocking client call on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, tracer.propagate(func), *args)
+    
+    async def get_coin_price(self, coin_id: str, vs_currency: str = "usd") -> Optional[Dict]:
+        """Get current price for a single coin"""
+        return await self._run(self.api.get_coin_price, coin_id, vs_currency)
+    
+    async def get_multiple_coin_prices(self, coin_ids: List[str], vs_currency: str = "usd") -> Optional[Dict]:
+        """Get current prices for multiple coins"""
+        return await self._run(self.api.get_multiple_coin_prices, coin_ids, vs_currency)
+    
+    async def get_top_coins(self, limit: int = 100, vs_currency: str = "usd") -> Optional[List]:
+        """Get top coins by market cap"""
+        return await self._run(self.api.get_top_coins, limit, vs_currency)
+    
+    async def search_coin(self, query: str) -> Optional[Dict]:
+        """Search for a coin by name or symbol"""
+        return await self._run(self.api.search_coin, query)
+    
+    async def search_coins(self, queries: List[str]) -> List[Optional[Dict]]:
+        """Search several names concurrently, returning results in query order"""
+        return await asyncio.gather(*(self.search_coin(query) for query in queries))
+    
+    def close(self) -> None:
+        """Shut down the worker pool"""
+        self.executor.shutdown(wait=False)
+
+def run_sync(coroutine: Awaitable) -> Any:
+    """Run a coroutine to completion from synchronous code (CLI and Tk callbacks)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Already inside an event loop: run on a private loop in a helper thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+shared_api = None
+shared_async_api = None
+shared_api_lock = threading.Lock()
+
+def get_shared_api() -> CoinGeckoAPI:
+    """The process-wide client: one session and connection pool for every tracker"""
+    global shared_api, shared_async_api
+    with shared_api_lock:
+        if shared_api is None:
+            shared_api = CoinGeckoAPI()
+            shared_async_api = AsyncCoinGeckoAPI(shared_api)
+        return shared_api
+
+def uncached_api() -> CoinGeckoAPI:
+    """A client whose every call reaches upstream, for callers that show data as fetched now
+    
+    It still shares the process rate limiter, circuit breaker and single-flight.
+    """
+    uncached = ResponseCache(ttls=dict.fromkeys(ResponseCache.DEFAULT_TTLS, 0), default_ttl=0)
+    return CoinGeckoAPI(cache=uncached, disk_cache=DiskCache(":memory:"))
+
+def get_shared_async_api() -> AsyncCoinGeckoAPI:
+    """Asyncio front-end for the process-wide client"""
+    get_shared_api()
+    return shared_async_api
+
+def start_metrics_server(api: CoinGeckoAPI, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve api.metrics at http://host:port/metrics in Prometheus text format, on a daemon thread"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = api.metrics.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass  # keep scrapes out of the terminal
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """Human-readable table of a CoinGeckoAPI.stats() snapshot"""
+    lines = [f"{'Endpoint':<16} {'Calls':>6} {'Errors':>6} {'Avg ms':>8} {'Max ms':>8} "
+             f"{'KB in':>9} {'Wait s':>7} {'Cache hit':>9}",
+             "-" * 76]
+    for endpoint, metrics in sorted(stats["endpoints"].items()):
+        lines.append(f"{endpoint:<16} {metrics['calls']:>6} {metrics['errors']:>6} "
+                     f"{metrics['latency_avg'] * 1000:>8.1f} {metrics['latency_max'] * 1000:>8.1f} "
+                     f"{metrics['bytes'] / 1024:>9.1f} {metrics['rate_wait_seconds']:>7.2f} "
+                     f"{metrics['cache_hit_ratio']:>9.0%}")
+    if not stats["endpoints"]:
+        lines.append("(no API calls made)")
+    retries = stats["retries"]
+    connections = stats["connections"]
+    lines.append("")
+    lines.append(f"Rate limit wait: {stats['rate_limiter']['total_wait_seconds']:.2f}s, "
+                 f"retries: {retries['retries']} ({retries['backoff_seconds']:.2f}s backoff), "
+                 f"breaker trips: {retries['breaker_trips']}")
+    lines.append(f"Connections: {connections['connections_opened']} opened, "
+                 f"{connections['connections_reused']} reused")
+    return "\n".join(lines)
+
+# Where a profiled function's own time went, matched in order against "file:function"
+PROFILE_AREAS = (
+    ("tk", ("tkinter", "_tkinter")),
+    ("decode", ("json", "codecs")),
+    ("network", ("socket", "ssl", "http/client", "urllib3", "requests/", "selectors")),
+    ("wait", ("_thread.lock", "threading.py", "concurrent/futures", "time.sleep")),
+    ("format", ("format_", "display_", "price_text", "change_text", "builtins.print", "LiveView")),
+)
+
+def profile_areas(stats: pstats.Stats) -> Dict[str, float]:
+    """Own (non-cumulative) seconds per area, so the areas add up to the profiled total"""
+    areas = {area: 0.0 for area, _ in PROFILE_AREAS}
+    areas["other"] = 0.0
+    for (filename, _, function), (_, _, own_time, _, _) in stats.stats.items():
+        label = f"{filename.replace(chr(92), '/')}:{function}"
+        for area, patterns in PROFILE_AREAS:
+            if any(pattern in label for pattern in patterns):
+                areas[area] += own_time
+                break
+        else:
+            areas["other"] += own_time
+    return areas
+
+class ProfileSession:
+    """One profiled user action, which may continue on worker threads and in later callbacks"""
+    def __init__(self, profiler: "ActionProfiler", action: str):
+        self.profiler = profiler
+        self.action = action
+        self.stats = None
+        self.pending = 1  # released by whoever started the action
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+    
+    def run(self, func: Callable, *args, wait: float = 0, **kwargs) -> Any:
+        """Call func under cProfile, adding its samples to this action
+        
+        Only one cProfile runs at a time (Python 3.12+ refuses a second), so this waits up to
+        `wait` seconds for the one in use; work that still overlaps it runs unprofiled.
+        """
+        previous = getattr(self.profiler.local, "session", None)
+        self.profiler.local.session = self
+        if not self.profiler.active.acquire(timeout=wait):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.profiler.local.session = previous
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            self.profiler.active.release()
+            self.profiler.local.session = previous
+            with self.lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profile)
+                else:
+                    self.stats.add(profile)
+    
+    def wrap(self, func: Callable, wait: float = 0) -> Callable:
+        """func, profiled as part of this action wherever it ends up being called"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(func, *args, wait=wait, **kwargs)
+        return wrapper
+    
+    def hold(self) -> None:
+        """Keep the action open for work that finishes later (e.g. a background task)"""
+        with self.lock:
+            self.pending += 1
+    
+    def release(self) -> None:
+        with self.lock:
+            self.pending -= 1
+            finished = self.pending == 0
+        if finished:
+            self.profiler.save(self)
+
+class ActionProfiler:
+    """Opt-in cProfile of user actions: one .prof file and a hot-function summary per action
+    
+    Off by default, where profile() is a plain call.
+    """
     def __init__(self):
-        self.api = CoinGeckoAPI()
-        self.coins_file = "coins_v2.json"
+        self.directory = None
+        self.top = 15
+        self.active = threading.Lock()
+        self.local = threading.local()
+        self.counts = {}
+        self.counts_lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+    
+    def enable(self, directory: str = "profiles", top: int = 15) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.top = top
+    
+    def current_session(self) -> Optional[ProfileSession]:
+        """The action being profiled on this thread, if any"""
+        if self.directory is None:
+            return None
+        return getattr(self.local, "session", None)
+    
+    def profile(self, action: str, func: Callable, *args, **kwargs) -> Any:
+        if self.directory is None or self.current_session() is not None:
+            # Off, or nested inside an action that is already being profiled
+            return func(*args, **kwargs)
+        session = ProfileSession(self, action)
+        try:
+            return session.run(func, *args, **kwargs)
+        finally:
+            session.release()
+    
+    def save(self, session: ProfileSession) -> Optional[str]:
+        """Write <action>-NNN.prof (for pstats/snakeviz) and a matching .txt summary"""
+        if session.stats is None:
+            return None
+        wall = time.perf_counter() - session.started
+        with self.counts_lock:
+            number = self.counts[session.action] = self.counts.get(session.action, 0) + 1
+        base = os.path.join(self.directory, f"{session.action}-{number:03d}")
+        stats = session.stats
+        stats.dump_stats(f"{base}.prof")
         
-    def load_coins(self) -> List[str]:
-        """Load saved coin IDs from file"""
-        if os.path.exists(self.coins_file):
+        areas = profile_areas(stats)
+        profiled = sum(areas.values()) or 1.0
+        split = ", ".join(f"{area} {seconds / profiled:.0%}"
+                          for area, seconds in sorted(areas.items(), key=lambda item: -item[1]) if seconds > 0)
+        with open(f"{base}.txt", "w") as file:
+            file.write(f"Action: {session.action}\n")
+            file.write(f"Wall time: {wall:.3f}s, profiled: {stats.total_tt:.3f}s\n\n")
+            file.write("Own time by area:\n")
+            for area, seconds in sorted(areas.items(), key=lambda item: -item[1]):
+                file.write(f"  {area:<8} {seconds:>8.3f}s {seconds / profiled:>5.0%}\n")
+            file.write(f"\nTop {self.top} functions by own time:\n")
+            stats.stream = file
+            stats.sort_stats("tottime").print_stats(self.top)
+            file.write(f"Top {self.top} functions by cumulative time:\n")
+            stats.sort_stats("cumulative").print_stats(self.top)
+        print(f"[profile] {session.action}: {wall:.2f}s ({split}) -> {base}.prof", file=sys.stderr)
+        return base
+
+action_profiler = ActionProfiler()
+
+def profiled(action: str) -> Callable[[Callable], Callable]:
+    """Decorator: profile each call as `action` when --profile is on"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return action_profiler.profile(action, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+class Span:
+    """One timed step of a user action, with attributes and a parent span
+    
+    A span ends when its `with` block exits, or, if work was handed off with hold(),
+    when the last holder calls end().
+    """
+    __slots__ = ("tracer", "name", "attributes", "span_id", "parent_id", "trace_id",
+                 "thread_id", "started_at", "started", "duration", "pending", "lock", "previous")
+    
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(tracer.ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.pending = 1
+        self.lock = threading.Lock()
+        self.previous = None
+    
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+    
+    def hold(self) -> None:
+        """Keep the span open for work that finishes later (e.g. a background task)"""
+        with self.lock:
+            self.pending += 1
+    
+    def end(self) -> None:
+        with self.lock:
+            self.pending -= 1
+            if self.pending:
+                return
+            self.duration = time.perf_counter() - self.started
+        self.tracer.export(self)
+    
+    def __enter__(self) -> "Span":
+        self.previous = getattr(self.tracer.local, "span", None)
+        self.tracer.local.span = self
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.tracer.local.span = self.previous
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.end()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+                "name": self.name, "thread": self.thread_id, "start": self.started_at,
+                "duration_ms": round(self.duration * 1000, 3), "attributes": self.attributes}
+    
+    def to_trace_event(self) -> Dict[str, Any]:
+        """A Chrome trace-event "complete" event (chrome://tracing, Perfetto)"""
+        return {"name": self.name, "cat": self.name.split(".", 1)[0], "ph": "X",
+                "ts": round(self.started * 1e6), "dur": round(self.duration * 1e6),
+                "pid": os.getpid(), "tid": self.thread_id,
+                "args": dict(self.attributes, trace_id=self.trace_id, span_id=self.span_id,
+                             parent_id=self.parent_id)}
+
+class NullSpan:
+    """What Tracer.span() returns while tracing is off: every operation is a no-op"""
+    def set(self, **attributes) -> None:
+        pass
+    
+    def hold(self) -> None:
+        pass
+    
+    def end(self) -> None:
+        pass
+    
+    def __enter__(self) -> "NullSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+null_span = NullSpan()
+
+class Tracer:
+    """Minimal opt-in tracing: nested spans from a user action down to each request and render
+    
+    Spans nest per thread; propagate() and bind() carry the current span onto worker
+    threads and Tk callbacks. Finished spans are appended to a JSON-lines file, or to
+    a Chrome trace-event file when the path does not end in .jsonl.
+    """
+    def __init__(self):
+        self.path = None
+        self.file = None
+        self.chrome = False
+        self.events = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.ids = count(1)
+    
+    @property
+    def enabled(self) -> bool:
+        return self.file is not None
+    
+    def enable(self, path: str = "trace.json") -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            self.path = path
+            self.chrome = not path.endswith(".jsonl")
+            self.file = open(path, "w", encoding="utf-8")
+            self.events = 0
+            if self.chrome:
+                self.file.write("[")
+        atexit.register(self.close)
+    
+    def close(self) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            if self.chrome:
+                self.file.write("\n]\n")
+            self.file.close()
+            self.file = None
+    
+    def current_span(self) -> Optional[Span]:
+        if self.file is None:
+            return None
+        return getattr(self.local, "span", None)
+    
+    def span(self, name: str, parent: Optional[Span] = None, **attributes) -> Union[Span, NullSpan]:
+        """A child of `parent` (default: the current span), used as `with tracer.span(...) as span:`"""
+        if self.file is None:
+            return null_span
+        if parent is None:
+            parent = getattr(self.local, "span", None)
+        return Span(self, name, parent, attributes)
+    
+    def annotate(self, **attributes) -> None:
+        """Set attributes on the current span, if any"""
+        span = self.current_span()
+        if span is not None:
+            span.set(**attributes)
+    
+    def bind(self, parent: Optional[Span], name: str, func: Callable) -> Callable:
+        """Wrap func to run as a child span of `parent`, on whatever thread calls it"""
+        if parent is None:
+            return func
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.span(name, parent=parent):
+                return func(*args, **kwargs)
+        return wrapper
+    
+    def propagate(self, func: Callable) -> Callable:
+        """Wrap func so spans it opens on another thread nest under the current span"""
+        parent = self.current_span()
+        if parent is None:
+            return func
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = getattr(self.local, "span", None)
+            self.local.span = parent
             try:
-                with open(self.coins_file, "r") as file:
-                    return json.load(file)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Error loading coins file: {e}")
-                return []
-        return []
-    
-    def save_coins(self, coin_ids: List[str]) -> None:
-        """Save coin IDs to file"""
+                return func(*args, **kwargs)
+            finally:
+                self.local.span = previous
+        return wrapper
+    
+    def export(self, span: Span) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            if self.chrome:
+                self.file.write(",\n" if self.events else "\n")
+                self.file.write(json.dumps(span.to_trace_event(), default=str))
+            else:
+                self.file.write(json.dumps(span.to_dict(), default=str) + "\n")
+            self.events += 1
+            self.file.flush()
+
+tracer = Tracer()
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Decorator: run each call in a span called `name` when --trace is on"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Exclusive advisory lock on `path`.lock, held across processes (no-op where unsupported)"""
+    with open(f"{path}.lock", "a") as handle:
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            return
         try:
-            with open(self.coins_file, "w") as file:
-                json.dump(coin_ids, file, indent=4)
+            import msvcrt
+        except ImportError:
+            yield
+            return
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue  # LK_LOCK gives up after ~10s; keep waiting
+        try:
+            yield
+        finally:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+class Watchlist:
+    """Insertion-ordered set of coin IDs: O(1) membership, add and remove"""
+    __slots__ = ("items",)
+    
+    def __init__(self, coin_ids: Iterable[str] = ()):
+        self.items = dict.fromkeys(coin_ids)  # dicts keep insertion order
+    
+    def __contains__(self, coin_id: object) -> bool:
+        return coin_id in self.items
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.items)
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Watchlist):
+            return list(self.items) == list(other.items)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"Watchlist({list(self.items)!r})"
+    
+    def add(self, coin_ids: Iterable[str]) -> List[str]:
+        """Append coins not already present, returning the ones actually added"""
+        added = [coin_id for coin_id in dict.fromkeys(coin_ids) if coin_id not in self.items]
+        self.items.update(dict.fromkeys(added))
+        return added
+    
+    def remove(self, coin_ids: Iterable[str]) -> List[str]:
+        """Drop coins, returning the ones that were present"""
+        removed = [coin_id for coin_id in dict.fromkeys(coin_ids) if coin_id in self.items]
+        for coin_id in removed:
+            del self.items[coin_id]
+        return removed
+    
+    def diff(self, coin_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """(added, removed) that turn this watchlist into `coin_ids`"""
+        target = dict.fromkeys(coin_ids)
+        added = [coin_id for coin_id in target if coin_id not in self.items]
+        removed = [coin_id for coin_id in self.items if coin_id not in target]
+        return added, removed
+    
+    def copy(self) -> "Watchlist":
+        watchlist = Watchlist()
+        watchlist.items = self.items.copy()
+        return watchlist
+    
+    def to_list(self) -> List[str]:
+        return list(self.items)
+
+class WatchlistStore(ABC):
+    """Where the saved coin IDs live; shared safely by every process using the same path"""
+    def load(self) -> List[str]:
+        return self.load_watchlist().to_list()
+    
+    @abstractmethod
+    def load_watchlist(self) -> Watchlist:
+        """The saved coins as an ordered set"""
+    
+    @abstractmethod
+    def save(self, coin_ids: Iterable[str]) -> None:
+        """Replace the whole watchlist"""
+    
+    @abstractmethod
+    def add(self, coin_ids: Iterable[str]) -> Watchlist:
+        """Append coins not already saved, returning the updated watchlist"""
+    
+    @abstractmethod
+    def remove(self, coin_ids: Iterable[str]) -> Watchlist:
+        """Drop coins, returning the updated watchlist"""
+
+class JsonWatchlistStore(WatchlistStore):
+    """Watchlist in a JSON file, cached until the file changes and replaced atomically"""
+    def __init__(self, path: str = "coins_v2.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.cached = Watchlist()
+        self.signature = None  # (mtime, size, inode) the cache was read at
+    
+    def _signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        # Every save renames a fresh file into place, so the inode changes even within one mtime tick
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _read(self) -> Watchlist:
+        """The saved watchlist, re-parsed only when the file changed since the last read"""
+        signature = self._signature()
+        if signature is None:
+            self.cached, self.signature = Watchlist(), None
+            return self.cached
+        if signature == self.signature:
+            return self.cached
+        try:
+            with open(self.path, "r") as file:
+                coin_ids = json.load(file)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading coins file: {e}")
+            return Watchlist()
+        if not isinstance(coin_ids, list):
+            coin_ids = []
+        self.cached = Watchlist(coin_id for coin_id in coin_ids if isinstance(coin_id, str))
+        self.signature = signature
+        return self.cached
+    
+    def _write(self, watchlist: Watchlist) -> None:
+        """Write to a temp file and rename it over the old one, so readers never see a partial file"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".coins-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(watchlist.to_list(), file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            self.signature = None  # the cache may be ahead of the file now
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.cached, self.signature = watchlist, self._signature()
+    
+    def load_watchlist(self) -> Watchlist:
+        with self.lock:
+            return self._read().copy()
+    
+    def save(self, coin_ids: Iterable[str]) -> None:
+        try:
+            with self.lock, file_lock(self.path):
+                watchlist = Watchlist(coin_ids)
+                if watchlist != self._read():
+                    self._write(watchlist)
         except IOError as e:
             print(f"Error saving coins file: {e}")
     
+    def _update(self, change: Callable[[Watchlist], List[str]]) -> Watchlist:
+        """Read-modify-write under the cross-process lock, writing only if something changed"""
+        try:
+            with self.lock, file_lock(self.path):
+                watchlist = self._read()
+                if change(watchlist):
+                    self._write(watchlist)
+                return watchlist.copy()
+        except IOError as e:
+            print(f"Error saving coins file: {e}")
+            return self.load_watchlist()
+    
+    def add(self, coin_ids: Iterable[str]) -> Watchlist:
+        return self._update(lambda watchlist: watchlist.add(coin_ids))
+    
+    def remove(self, coin_ids: Iterable[str]) -> Watchlist:
+        return self._update(lambda watchlist: watchlist.remove(coin_ids))
+
+class SqliteWatchlistStore(WatchlistStore):
+    """Watchlist in SQLite: adds and removes touch only the affected rows"""
+    def __init__(self, path: str = "coins_v2.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = None
+        self.cached = Watchlist()
+        self.data_version = None  # bumped by SQLite whenever another connection commits
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False,
+                                         isolation_level=None)
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS watchlist ("
+                "coin_id TEXT PRIMARY KEY, position INTEGER NOT NULL)"
+            )
+            self.connection = connection
+        return self.connection
+    
+    def _read(self, connection: sqlite3.Connection) -> Watchlist:
+        """The cached watchlist, re-read only after another connection committed"""
+        version = connection.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.data_version:
+            rows = connection.execute("SELECT coin_id FROM watchlist ORDER BY position").fetchall()
+            self.cached = Watchlist(row[0] for row in rows)
+            self.data_version = version
+        return self.cached
+    
+    def load_watchlist(self) -> Watchlist:
+        try:
+            with self.lock:
+                return self._read(self._connect()).copy()
+        except sqlite3.Error as e:
+            print(f"Error loading watchlist database: {e}")
+            return Watchlist()
+    
+    def _transaction(self, apply: Callable[[sqlite3.Connection, Watchlist], None]) -> Watchlist:
+        """Run `apply` on a fresh copy of the watchlist inside a write transaction"""
+        try:
+            with self.lock:
+                connection = self._connect()
+                # IMMEDIATE takes the write lock up front, so concurrent writers queue instead of failing
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    watchlist = self._read(connection).copy()
+                    apply(connection, watchlist)
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+                # Our own commits don't bump data_version, so the cache is updated by hand
+                self.cached = watchlist
+                return watchlist.copy()
+        except sqlite3.Error as e:
+            print(f"Error saving watchlist database: {e}")
+            return self.load_watchlist()
+    
+    def _insert(self, connection: sqlite3.Connection, coin_ids: List[str]) -> None:
+        if not coin_ids:
+            return
+        last = connection.execute("SELECT COALESCE(MAX(position), -1) FROM watchlist").fetchone()[0]
+        connection.executemany("INSERT INTO watchlist (coin_id, position) VALUES (?, ?)",
+                               ((coin_id, last + offset) for offset, coin_id in enumerate(coin_ids, 1)))
+    
+    def _delete(self, connection: sqlite3.Connection, coin_ids: List[str]) -> None:
+        connection.executemany("DELETE FROM watchlist WHERE coin_id = ?", ((coin_id,) for coin_id in coin_ids))
+    
+    def save(self, coin_ids: Iterable[str]) -> None:
+        target = Watchlist(coin_ids)
+        
+        def apply(connection, watchlist):
+            added, removed = watchlist.diff(target)
+            watchlist.remove(removed)
+            watchlist.add(added)
+            if watchlist == target:
+                # Same order apart from appended coins: write just the difference
+                self._delete(connection, removed)
+                self._insert(connection, added)
+            else:
+                connection.execute("DELETE FROM watchlist")
+                connection.executemany("INSERT INTO watchlist (coin_id, position) VALUES (?, ?)",
+                                       ((coin_id, position) for position, coin_id in enumerate(target)))
+                watchlist.items = target.items
+        self._transaction(apply)
+    
+    def add(self, coin_ids: Iterable[str]) -> Watchlist:
+        return self._transaction(lambda connection, watchlist:
+                                 self._insert(connection, watchlist.add(coin_ids)))
+    
+    def remove(self, coin_ids: Iterable[str]) -> Watchlist:
+        return self._transaction(lambda connection, watchlist:
+                                 self._delete(connection, watchlist.remove(coin_ids)))
+
+def open_watchlist_store(path: str) -> WatchlistStore:
+    """SQLite for .db/.sqlite paths, JSON otherwise"""
+    if path == ":memory:" or path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteWatchlistStore(path)
+    return JsonWatchlistStore(path)
+
+shared_watchlist_store = None
+shared_watchlist_lock = threading.Lock()
+
+def get_shared_watchlist_store() -> WatchlistStore:
+    """The process-wide watchlist store, so every tracker shares its cache"""
+    global shared_watchlist_store
+    with shared_watchlist_lock:
+        if shared_watchlist_store is None:
+            shared_watchlist_store = JsonWatchlistStore("coins_v2.json")
+        return shared_watchlist_store
+
+def use_watchlist(path: str) -> WatchlistStore:
+    """Point the process-wide watchlist at another file (JSON or SQLite)"""
+    global shared_watchlist_store
+    with shared_watchlist_lock:
+        shared_watchlist_store = open_watchlist_store(path)
+        return shared_watchlist_store
+
+class PriceSnapshotStore:
+    """Latest prices published by a --poll daemon, shared by every local frontend through SQLite
+    
+    The poller writes the prices of every registered watchlist plus the top N markets once
+    per interval. Frontends read from it and ask the poller to cover any coins it missed.
+    Rows older than twice the poll interval count as missing, so a stopped poller
+    quietly sends everyone back to the API. Only the poller creates the database: until
+    one has, frontends never touch the disk and go straight to the API.
+    """
+    def __init__(self, path: str = "price_snapshot.db", interest_ttl: float = 10 * 60):
+        self.path = path
+        self.interest_ttl = interest_ttl  # how long a frontend's request keeps a coin or top N polled
+        self.lock = threading.Lock()
+        self.connection = None
+        self.meta = {}
+        self.data_version = None
+        self.registered = set()
+        self.unregistered = set()  # watchlist paths waiting for a poller to create the snapshot
+    
+    def _connect(self, create: bool = False) -> Optional[sqlite3.Connection]:
+        """The open snapshot, or None for a frontend (create=False) while no poller has made one"""
+        if self.connection is None:
+            if not create and self.path != ":memory:" and not os.path.exists(self.path):
+                return None
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False,
+                                         isolation_level=None)
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                " coin_id TEXT PRIMARY KEY, body TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS markets ("
+                " position INTEGER PRIMARY KEY, coin_id TEXT NOT NULL, body TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS watchlists (path TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS wanted (coin_id TEXT PRIMARY KEY, requested_at REAL NOT NULL)"
+            )
+            self.connection = connection
+        if self.unregistered:
+            now = time.time()
+            self.connection.executemany("INSERT OR REPLACE INTO watchlists (path, seen_at) VALUES (?, ?)",
+                                        [(path, now) for path in self.unregistered])
+            self.unregistered.clear()
+            self.data_version = None
+        return self.connection
+    
+    def _meta(self, connection: sqlite3.Connection) -> Dict[str, Any]:
+        """The poller's settings and timestamps, re-read only after another connection committed"""
+        version = connection.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.data_version:
+            self.meta = {key: json_loads(value) for key, value in connection.execute("SELECT key, value FROM meta")}
+            self.data_version = version
+        return self.meta
+    
+    def _live_meta(self, connection: Optional[sqlite3.Connection], base_url: str,
+                   vs_currency: str) -> Optional[Dict]:
+        """The meta of a poller that is running against this upstream and currency, else None"""
+        if connection is None:
+            return None
+        meta = self._meta(connection)
+        if meta.get("base_url") != base_url or meta.get("vs_currency") != vs_currency:
+            return None
+        if time.time() - meta.get("heartbeat", 0) > self.max_age(meta):
+            return None
+        return meta
+    
+    @staticmethod
+    def max_age(meta: Dict) -> float:
+        """How long a published price stays usable: two missed polls plus some slack"""
+        return 2 * meta.get("interval", 60) + 10
+    
+    def quotes(self, coin_ids: List[str], base_url: str,
+               vs_currency: str = "usd") -> Tuple[Dict[str, CoinQuote], List[str]]:
+        """Fresh snapshot quotes for coin_ids, plus the ids the snapshot could not answer"""
+        try:
+            with self.lock:
+                connection = self._connect()
+                meta = self._live_meta(connection, base_url, vs_currency)
+                if meta is None:
+                    return {}, list(coin_ids)
+                oldest = time.time() - self.max_age(meta)
+                quotes = {}
+                for start in range(0, len(coin_ids), 500):  # stay under SQLite's bound-variable limit
+                    chunk = coin_ids[start:start + 500]
+                    rows = connection.execute(
+                        f"SELECT coin_id, body FROM prices WHERE updated_at >= ? "
+                        f"AND coin_id IN ({','.join('?' * len(chunk))})", (oldest, *chunk)
+                    ).fetchall()
+                    for coin_id, body in rows:
+                        quotes[coin_id] = CoinQuote.from_price(coin_id, json_loads(body), vs_currency)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Price snapshot read error: {e}")
+            return {}, list(coin_ids)
+        return quotes, [coin_id for coin_id in coin_ids if coin_id not in quotes]
+    
+    def top_quotes(self, limit: int, base_url: str, vs_currency: str = "usd") -> Optional[List[CoinQuote]]:
+        """The top `limit` coins from a fresh snapshot, or None if it doesn't cover them"""
+        try:
+            with self.lock:
+                connection = self._connect()
+                meta = self._live_meta(connection, base_url, vs_currency)
+                if (meta is None or meta.get("markets_limit", 0) < limit
+                        or time.time() - meta.get("markets_updated_at", 0) > self.max_age(meta)):
+                    return None
+                rows = connection.execute(
+                    "SELECT body FROM markets ORDER BY position LIMIT ?", (limit,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Price snapshot read error: {e}")
+            return None
+        return [CoinQuote.from_market(json_loads(row[0])) for row in rows]
+    
+    def register_watchlist(self, path: str) -> None:
+        """Add a watchlist file to the set the poller covers (once per process)
+        
+        With no snapshot yet, it is recorded as soon as a poller has created one.
+        """
+        if path == ":memory:" or path in self.registered:
+            return
+        self.registered.add(path)
+        try:
+            with self.lock:
+                self.unregistered.add(os.path.abspath(path))
+                self._connect()
+        except sqlite3.Error as e:
+            print(f"Price snapshot write error: {e}")
+    
+    def want(self, coin_ids: List[str], base_url: str, vs_currency: str = "usd") -> None:
+        """Ask a running poller to include these coins from its next poll"""
+        if coin_ids and self.is_live(base_url, vs_currency):
+            now = time.time()
+            self._write("INSERT OR REPLACE INTO wanted (coin_id, requested_at) VALUES (?, ?)",
+                        [(coin_id, now) for coin_id in coin_ids])
+    
+    def want_top(self, limit: int, base_url: str, vs_currency: str = "usd") -> None:
+        """Ask a running poller to cover the top `limit` coins from its next poll"""
+        if self.is_live(base_url, vs_currency):
+            self._write("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [("top_wanted", json.dumps([limit, time.time()]))])
+    
+    def is_live(self, base_url: str, vs_currency: str = "usd") -> bool:
+        try:
+            with self.lock:
+                return self._live_meta(self._connect(), base_url, vs_currency) is not None
+        except sqlite3.Error:
+            return False
+    
+    def _write(self, sql: str, rows: List[tuple]) -> None:
+        try:
+            with self.lock:
+                connection = self._connect()
+                if connection is None:
+                    return
+                connection.executemany(sql, rows)
+                # Our own commits don't bump data_version, so force the next meta read
+                self.data_version = None
+        except sqlite3.Error as e:
+            print(f"Price snapshot write error: {e}")
+    
+    def demand(self) -> Tuple[List[str], List[str], int]:
+        """(registered watchlist paths, coins requested recently, top N requested recently)
+        
+        Requests older than interest_ttl are dropped on the way.
+        """
+        oldest = time.time() - self.interest_ttl
+        with self.lock:
+            connection = self._connect(create=True)
+            connection.execute("DELETE FROM wanted WHERE requested_at < ?", (oldest,))
+            self.data_version = None
+            paths = [row[0] for row in connection.execute("SELECT path FROM watchlists ORDER BY seen_at")]
+            wanted = [row[0] for row in connection.execute("SELECT coin_id FROM wanted ORDER BY requested_at")]
+            top_wanted = self._meta(connection).get("top_wanted")
+        top = top_wanted[0] if top_wanted and top_wanted[1] >= oldest else 0
+        return paths, wanted, top
+    
+    def forget_watchlist(self, path: str) -> None:
+        self._write("DELETE FROM watchlists WHERE path = ?", [(path,)])
+    
+    def publish(self, base_url: str, vs_currency: str, interval: float, prices: Dict[str, Dict],
+                markets: Optional[List[Dict]] = None) -> None:
+        """Write one poll's results in a single transaction"""
+        now = time.time()
+        meta = {"base_url": base_url, "vs_currency": vs_currency, "interval": interval, "heartbeat": now}
+        with self.lock:
+            connection = self._connect(create=True)
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO prices (coin_id, body, updated_at) VALUES (?, ?, ?)",
+                    ((coin_id, json.dumps(data, separators=(",", ":")), now) for coin_id, data in prices.items())
+                )
+                connection.execute("DELETE FROM prices WHERE updated_at < ?", (now - 24 * 60 * 60,))
+                if markets is not None:
+                    connection.execute("DELETE FROM markets")
+                    connection.executemany(
+                        "INSERT INTO markets (position, coin_id, body) VALUES (?, ?, ?)",
+                        ((position, coin.get("id") or "", json.dumps(coin, separators=(",", ":")))
+                         for position, coin in enumerate(markets))
+                    )
+                    meta.update(markets_limit=len(markets), markets_updated_at=now)
+                connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                       ((key, json.dumps(value)) for key, value in meta.items()))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self.data_version = None
+
+shared_snapshot_store = None
+shared_snapshot_lock = threading.Lock()
+
+def get_shared_snapshot_store() -> PriceSnapshotStore:
+    """The process-wide price snapshot, read by every tracker"""
+    global shared_snapshot_store
+    with shared_snapshot_lock:
+        if shared_snapshot_store is None:
+            shared_snapshot_store = PriceSnapshotStore()
+        return shared_snapshot_store
+
+def use_snapshot(path: str) -> PriceSnapshotStore:
+    """Point the process-wide price snapshot at another file"""
+    global shared_snapshot_store
+    with shared_snapshot_lock:
+        shared_snapshot_store = PriceSnapshotStore(path)
+        return shared_snapshot_store
+
+class PricePoller:
+    """Daemon that polls the union of all watchlists plus the top N into a PriceSnapshotStore
+    
+    However many CLIs and dashboards are open, upstream sees one poller. A second poller on
+    the same snapshot waits on its lock as a standby and takes over when the first exits.
+    Its default client skips the response caches: every poll must reach upstream, since
+    what it publishes is stamped as fetched now.
+    """
+    def __init__(self, api: Optional[CoinGeckoAPI] = None, snapshot: Optional[PriceSnapshotStore] = None,
+                 top: int = 100, interval: float = 30.0, watchlists: Iterable[str] = (),
+                 vs_currency: str = "usd"):
+        self.api = api or uncached_api()
+        self.snapshot = snapshot or get_shared_snapshot_store()
+        self.top = top
+        self.interval = interval
+        self.watchlists = [os.path.abspath(path) for path in watchlists]
+        self.vs_currency = vs_currency
+        self.stores = {}  # path -> WatchlistStore, kept so their read caches carry across polls
+    
+    def _store(self, path: str) -> WatchlistStore:
+        if path not in self.stores:
+            self.stores[path] = open_watchlist_store(path)
+        return self.stores[path]
+    
+    def demand(self) -> Tuple[List[str], int]:
+        """Every coin to poll and how many top coins to fetch"""
+        paths, wanted, top_wanted = self.snapshot.demand()
+        coin_ids = Watchlist()
+        for path in dict.fromkeys(self.watchlists + paths):
+            if not os.path.exists(path):
+                if path not in self.watchlists:
+                    self.snapshot.forget_watchlist(path)
+                self.stores.pop(path, None)
+                continue
+            coin_ids.add(self._store(path).load())
+        coin_ids.add(wanted)
+        return coin_ids.to_list(), max(self.top, top_wanted)
+    
+    @traced("poller.poll")
+    def poll_once(self) -> Dict[str, int]:
+        """Fetch everything in demand and publish it; returns counts for the status line"""
+        coin_ids, top = self.demand()
+        prices = {}
+        markets = None
+        if top:
+            quotes = list(self.api.iter_top_quotes(top, self.vs_currency))
+            markets = [quote.market_entry() for quote in quotes] or None
+            for quote in quotes:
+                if quote.id:
+                    prices[quote.id] = quote.price_entry(self.vs_currency)
+        # Coins already in the top N came with the markets pages
+        remaining = [coin_id for coin_id in coin_ids if coin_id not in prices]
+        failed = []
+        if remaining:
+            quotes, failed = self.api.get_multiple_coin_prices_report(remaining, self.vs_currency)
+            prices.update((coin_id, quote.price_entry(self.vs_currency)) for coin_id, quote in quotes.items())
+        self.snapshot.publish(self.api.base_url, self.vs_currency, self.interval, prices, markets)
+        tracer.annotate(coins=len(coin_ids), top=len(markets or []), failed=len(failed))
+        return {"coins": len(coin_ids), "top": len(markets or []), "failed": len(failed)}
+    
+    def run(self, iterations: Optional[int] = None) -> None:
+        """Poll every interval until Ctrl+C (or for `iterations` polls)"""
+        polls = 0
+        # Long-running, so it also keeps the on-disk coin index fresh for frontends that start later
+        coin_index = coin_index_for(self.api)
+        coin_index.load()
+        coin_index.keep_fresh(self.api)
+        try:
+            with file_lock(self.snapshot.path):
+                print(f"Polling every {self.interval:g}s into {self.snapshot.path} (Ctrl+C to stop)")
+                while iterations is None or polls < iterations:
+                    started = time.monotonic()
+                    try:
+                        counts = self.poll_once()
+                        failed = f", {counts['failed']} failed" if counts["failed"] else ""
+                        print(f"[{time.strftime('%H:%M:%S')}] Published {counts['coins']} watched coins "
+                              f"and the top {counts['top']}{failed}")
+                    except sqlite3.Error as e:
+                        print(f"Price snapshot write error: {e}")
+                    polls += 1
+                    if iterations is None or polls < iterations:
+                        time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            print("\nStopped polling.")
+
+class CryptoPriceTracker:
+    def __init__(self, api: Optional[CoinGeckoAPI] = None, store: Optional[WatchlistStore] = None,
+                 snapshot: Optional[PriceSnapshotStore] = None):
+        if api is None:
+            self.api = get_shared_api()
+            self.async_api = get_shared_async_api()
+        else:
+            self.api = api
+            self.async_api = AsyncCoinGeckoAPI(api)
+        self.store = store or get_shared_watchlist_store()
+        self.coin_index = coin_index_for(self.api)
+        self.coin_index.load()
+        self.coin_index.keep_fresh(self.api)
+        self.name_memo = {}  # normalized name -> coin id
+        # Prices come from a running --poll daemon when there is one, else straight from the API.
+        # A private client gets a private snapshot, so it never reads or registers in the shared one
+        if snapshot is None:
+            snapshot = get_shared_snapshot_store() if api is None else PriceSnapshotStore(":memory:")
+        self.snapshot = snapshot
+        if getattr(self.store, "path", None):
+            self.snapshot.register_watchlist(self.store.path)
+        
+    @traced("tracker.load_coins")
+    def load_coins(self) -> List[str]:
+        """Load saved coin IDs"""
+        return self.store.load()
+    
+    @traced("tracker.load_watchlist")
+    def load_watchlist(self) -> Watchlist:
+        """Load saved coin IDs as an ordered set"""
+        return self.store.load_watchlist()
+    
+    @traced("tracker.save_coins")
+    def save_coins(self, coin_ids: Iterable[str]) -> None:
+        """Replace the saved coin IDs"""
+        self.store.save(coin_ids)
+    
+    @traced("tracker.add_coins")
+    def add_coins(self, coin_ids: Iterable[str]) -> Watchlist:
+        """Add coins to the saved list (keeping its order), returning the updated list"""
+        return self.store.add(coin_ids)
+    
+    @traced("tracker.remove_coins")
+    def remove_coins(self, coin_ids: Iterable[str]) -> Watchlist:
+        """Remove coins from the saved list, returning the updated list"""
+        return self.store.remove(coin_ids)
+    
+    @traced("tracker.get_price_quotes")
+    def get_price_quotes(self, coin_ids: List[str], vs_currency: str = "usd") -> Optional[Dict[str, CoinQuote]]:
+        """Quotes for coin_ids from the shared snapshot, fetching only what it lacks"""
+        quotes, missing = self.snapshot.quotes(coin_ids, self.api.base_url, vs_currency)
+        tracer.annotate(ids=len(coin_ids), snapshot=len(quotes), fetched=len(missing))
+        if not missing:
+            return quotes
+        self.snapshot.want(missing, self.api.base_url, vs_currency)
+        fetched = self.api.get_price_quotes(missing, vs_currency)
+        if fetched is None and not quotes:
+            return None
+        quotes.update(fetched or {})
+        return quotes
+    
+    def iter_top_quotes(self, limit: int = 100, vs_currency: str = "usd") -> Iterator[CoinQuote]:
+        """The top coins from the shared snapshot, or page by page from the API"""
+        quotes = self.snapshot.top_quotes(limit, self.api.base_url, vs_currency)
+        tracer.annotate(snapshot=quotes is not None)
+        if quotes is not None:
+            return iter(quotes)
+        self.snapshot.want_top(limit, self.api.base_url, vs_currency)
+        return self.api.iter_top_quotes(limit, vs_currency)
+    
     def coin_name_to_id(self, coin_name: str) -> Optional[str]:
         """Convert coin name/symbol to CoinGecko ID"""
-        search_result = self.api.search_coin(coin_name)
+        coin_id = self.coin_index.lookup(coin_name)
+        if coin_id:
+            return coin_id
+        
+        # Not in the local index (or it isn't built yet): fall back to /search
+        return self._first_search_match(self.api.search_coin(coin_name))
+    
+    @staticmethod
+    def _first_search_match(search_result: Optional[Dict]) -> Optional[str]:
+        """Pick the ID of the most relevant /search hit"""
         if not search_result:
             return None
             
@@ -104,60 +2585,234 @@ class CryptoPriceTracker:
             return coins[0].get("id")
         return None
     
-    def format_price(self, price_data: Dict, coin_id: str) -> str:
+    @staticmethod
+    def normalize_name(coin_name: str) -> str:
+        """Canonical form of a user-typed coin name or symbol"""
+        return " ".join(coin_name.split()).lower()
+    
+    @traced("tracker.resolve_many")
+    def resolve_many(self, coin_names: List[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        """Resolve many names at once, searching only the unknown ones, concurrently
+        
+        Returns {name: {"id": coin_id or None, "status": status}} in input order, where
+        status is "memo", "index", "search", "not_found" or "error".
+        """
+        names = [coin_name.strip() for coin_name in coin_names if coin_name.strip()]
+        resolved = {}  # normalized name -> result
+        pending = []
+        for coin_name in names:
+            key = self.normalize_name(coin_name)
+            if key in resolved:
+                continue
+            if key in self.name_memo:
+                resolved[key] = {"id": self.name_memo[key], "status": "memo"}
+                continue
+            coin_id = self.coin_index.lookup(key)
+            if coin_id:
+                resolved[key] = {"id": coin_id, "status": "index"}
+            else:
+                resolved[key] = None
+                pending.append(key)
+        
+        tracer.annotate(names=len(names), searches=len(pending))
+        if pending:
+            search_results = run_sync(self.async_api.search_coins(pending))
+            for key, search_result in zip(pending, search_results):
+                coin_id = self._first_search_match(search_result)
+                if coin_id:
+                    resolved[key] = {"id": coin_id, "status": "search"}
+                else:
+                    resolved[key] = {"id": None, "status": "error" if search_result is None else "not_found"}
+        
+        for key, result in resolved.items():
+            if result["id"]:
+                self.name_memo[key] = result["id"]
+        return {coin_name: resolved[self.normalize_name(coin_name)] for coin_name in names}
+    
+    @staticmethod
+    def resolved_ids(resolution: Dict[str, Dict[str, Optional[str]]]) -> List[str]:
+        """Unique coin IDs from a resolve_many() result, in input order"""
+        coin_ids = []
+        for result in resolution.values():
+            if result["id"] and result["id"] not in coin_ids:
+                coin_ids.append(result["id"])
+        return coin_ids
+    
+    def format_price(self, quotes: Dict[str, CoinQuote], coin_id: str) -> str:
         """Format price data for display"""
-        if coin_id not in price_data:
+        quote = quotes.get(coin_id)
+        if quote is None:
             return "Price not found"
-            
-        coin_data = price_data[coin_id]
-        price = coin_data.get("usd", "N/A")
-        change_24h = coin_data.get("usd_24h_change", 0)
         
-        if isinstance(price, (int, float)):
-            price_str = f"${price:,.2f}"
+        if quote.change_24h is not None:
+            return f"{quote.price_text()} ({quote.change_24h:+.2f}%)"
+        
+        return quote.price_text()
+    
+    def format_price_line(self, quotes: Dict[str, CoinQuote], coin_id: str) -> str:
+        """One row of the Coin/Price table"""
+        return f"{coin_id.title():<20} {self.format_price(quotes, coin_id):<20}"
+    
+    @traced("render.prices")
+    def display_prices(self, coin_ids: List[str], quotes: Dict[str, CoinQuote]) -> None:
+        """Display the Coin/Price table for a list of coin IDs"""
+        tracer.annotate(rows=len(coin_ids))
+        print(f"\n{'Coin':<20} {'Price':<20}")
+        print("-" * 40)
+        
+        for coin_id in coin_ids:
+            print(self.format_price_line(quotes, coin_id))
+    
+    coins_header = f"{'Rank':<6} {'Name':<20} {'Symbol':<8} {'Price':<15} {'24h Change':<12} {'Market Cap':<15}"
+    
+    def format_coin_line(self, quote: CoinQuote) -> str:
+        """One row of the market data table"""
+        rank = quote.rank if quote.rank is not None else "N/A"
+        market_cap = quote.market_cap
+        
+        if market_cap is not None and market_cap > 0:
+            if market_cap >= 1e12:
+                market_cap_str = f"${market_cap/1e12:.2f}T"
+            elif market_cap >= 1e9:
+                market_cap_str = f"${market_cap/1e9:.2f}B"
+            elif market_cap >= 1e6:
+                market_cap_str = f"${market_cap/1e6:.2f}M"
+            else:
+                market_cap_str = f"${market_cap:,.0f}"
         else:
-            price_str = str(price)
-            
-        if isinstance(change_24h, (int, float)):
-            change_str = f" ({change_24h:+.2f}%)"
-            return f"{price_str}{change_str}"
+            market_cap_str = "N/A"
         
-        return price_str
+        return (f"{rank:<6} {quote.name[:19]:<20} {quote.symbol:<8} {quote.price_text():<15} "
+                f"{quote.change_text():<12} {market_cap_str:<15}")
     
-    def display_coins_data(self, coins_data: List[Dict]) -> None:
-        """Display formatted coin data"""
-        if not coins_data:
+    @traced("render.coins")
+    def display_coins_data(self, coins_data: Iterable[CoinQuote]) -> None:
+        """Display formatted coin data, printing rows as they arrive"""
+        coins_iter = iter(coins_data or [])
+        first_coin = next(coins_iter, None)
+        if first_coin is None:
             print("No data available")
             return
             
-        print(f"\n{'Rank':<6} {'Name':<20} {'Symbol':<8} {'Price':<15} {'24h Change':<12} {'Market Cap':<15}")
+        print(f"\n{self.coins_header}")
         print("-" * 85)
         
-        for coin in coins_data:
-            rank = coin.get("market_cap_rank", "N/A")
-            name = coin.get("name", "N/A")[:19]
-            symbol = coin.get("symbol", "N/A").upper()
-            price = coin.get("current_price", 0)
-            change_24h = coin.get("price_change_percentage_24h", 0)
-            market_cap = coin.get("market_cap", 0)
-            
-            price_str = f"${price:,.2f}" if isinstance(price, (int, float)) else "N/A"
-            change_str = f"{change_24h:+.2f}%" if isinstance(change_24h, (int, float)) else "N/A"
-            
-            if isinstance(market_cap, (int, float)) and market_cap > 0:
-                if market_cap >= 1e12:
-                    market_cap_str = f"${market_cap/1e12:.2f}T"
-                elif market_cap >= 1e9:
-                    market_cap_str = f"${market_cap/1e9:.2f}B"
-                elif market_cap >= 1e6:
-                    market_cap_str = f"${market_cap/1e6:.2f}M"
-                else:
-                    market_cap_str = f"${market_cap:,.0f}"
-            else:
-                market_cap_str = "N/A"
-            
-            print(f"{rank:<6} {name:<20} {symbol:<8} {price_str:<15} {change_str:<12} {market_cap_str:<15}")
+        rows = 0
+        for quote in chain([first_coin], coins_iter):
+            print(self.format_coin_line(quote))
+            rows += 1
+        tracer.annotate(rows=rows)
 
+class LiveView:
+    """Redraws a block of terminal lines in place, rewriting only the lines that changed
+    
+    While capture() is active, anything else printed (request errors, index rebuilds) goes
+    through the view, which then draws a fresh block below it instead of moving the cursor
+    up into the wrong lines.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.lines = []
+        self.interactive = self.stream.isatty()
+        self.interrupted = False  # something else was written below the block since the last render
+    
+    def write(self, text: str) -> int:
+        if text:
+            self.interrupted = True
+        return self.stream.write(text)
+    
+    def flush(self) -> None:
+        self.stream.flush()
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+    
+    @contextmanager
+    def capture(self) -> Iterator["LiveView"]:
+        """Stand in for sys.stdout, so other output is noticed"""
+        previous = sys.stdout
+        sys.stdout = self
+        try:
+            yield self
+        finally:
+            sys.stdout = previous
+    
+    def render(self, lines: List[str]) -> int:
+        """Show `lines`, returning how many of them had to be written"""
+        width = shutil.get_terminal_size().columns - 1
+        # Wrapped lines would throw off the cursor arithmetic
+        lines = [line[:width] for line in lines]
+        write = self.stream.write
+        
+        if not self.interactive:
+            # Piped output: no cursor control, append each snapshot
+            write("\n".join(lines) + "\n\n")
+            written = len(lines)
+        elif len(lines) != len(self.lines) or self.interrupted:
+            if self.lines and not self.interrupted:
+                write(f"\x1b[{len(self.lines)}A")  # back to the top of the block
+            write("\r\x1b[J" + "\n".join(lines) + "\n")  # clear below, redraw everything
+            written = len(lines)
+        else:
+            written = 0
+            for i, (old, new) in enumerate(zip(self.lines, lines)):
+                if old != new:
+                    up = len(lines) - i
+                    write(f"\x1b[{up}A\r\x1b[2K{new}\x1b[{up}B\r")
+                    written += 1
+        self.stream.flush()
+        self.lines = lines
+        self.interrupted = False
+        return written
+
+def ask_refresh() -> bool:
+    """Ask Menu or Refresh, returning True for Refresh"""
+    while True:
+        menu_or_refresh = input("\nMenu or Refresh? (m/r): ").lower()
+        if menu_or_refresh == 'r':
+            return True
+        elif menu_or_refresh == 'm':
+            return False
+        else:
+            print("Invalid choice. Please enter 'm' for Menu or 'r' for Refresh.")
+
+def show_prices(tracker: CryptoPriceTracker, coin_ids: List[str]) -> bool:
+    """Fetch and print prices for coin_ids, returning False if the fetch failed"""
+    quotes = tracker.get_price_quotes(coin_ids)
+    if not quotes:
+        print("Failed to fetch price data")
+        return False
+    tracker.display_prices(coin_ids, quotes)
+    return True
+
+def show_top_coins(tracker: CryptoPriceTracker, limit: int) -> bool:
+    """Fetch and print the top `limit` coins, returning False if the fetch failed"""
+    print(f"\nFetching top {limit} cryptocurrencies...")
+    coins_data = tracker.iter_top_quotes(limit)
+    first_coin = next(coins_data, None)
+    
+    if first_coin is None:
+        print("Failed to fetch top coins data")
+        return False
+    
+    print(f"\nTop {limit} Cryptocurrencies by Market Cap:")
+    tracker.display_coins_data(chain([first_coin], coins_data))
+    return True
+
+def resolve_coin_names(tracker: CryptoPriceTracker, coin_names: List[str]) -> List[str]:
+    """Look up typed names/symbols, reporting each match, and return the coin IDs found"""
+    resolution = tracker.resolve_many(coin_names)
+    for coin_name, result in resolution.items():
+        if result["id"]:
+            print(f"Found: {coin_name} -> {result['id']}")
+        else:
+            print(f"Could not find coin: {coin_name}")
+    return tracker.resolved_ids(resolution)
+
+# The menu actions profile only their fetch-and-display steps, once per refresh, so time
+# spent at the prompts is never charged to an action.
+
+@traced("cli.previous_selection")
 def previous_selection():
     """Load and display previously saved coins"""
     tracker = CryptoPriceTracker()
@@ -171,32 +2826,19 @@ def previous_selection():
         else:
             return []
     
-    print("\nLoading previous selection and fetching prices:")
-    
-    price_data = tracker.api.get_multiple_coin_prices(coin_ids)
-    if not price_data:
-        print("Failed to fetch price data")
-        return coin_ids
-    
-    print(f"\n{'Coin':<20} {'Price':<20}")
-    print("-" * 40)
-    
-    for coin_id in coin_ids:
-        formatted_price = tracker.format_price(price_data, coin_id)
-        print(f"{coin_id.title():<20} {formatted_price:<20}")
-    
     while True:
-        menu_or_refresh = input("\nMenu or Refresh? (m/r): ").lower()
-        if menu_or_refresh == 'r':
-            previous_selection()
-            break
-        elif menu_or_refresh == 'm':
+        print("\nLoading previous selection and fetching prices:")
+        
+        if not action_profiler.profile("previous_selection", show_prices, tracker, coin_ids):
+            return coin_ids
+        
+        if not ask_refresh():
             break
-        else:
-            print("Invalid choice. Please enter 'm' for Menu or 'r' for Refresh.")
+        coin_ids = tracker.load_coins() or coin_ids
     
     return coin_ids
 
+@traced("cli.add_coins")
 def add_coins(current_coins: List[str]) -> List[str]:
     """Add new coins to track"""
     tracker = CryptoPriceTracker()
@@ -204,29 +2846,23 @@ def add_coins(current_coins: List[str]) -> List[str]:
     new_coins_input = input("\nWhat coins would you like to add to track? (Comma-separated names/symbols): ")
     new_coin_names = [coin.strip() for coin in new_coins_input.split(",")]
     
-    new_coin_ids = []
-    for coin_name in new_coin_names:
-        coin_id = tracker.coin_name_to_id(coin_name)
-        if coin_id:
-            new_coin_ids.append(coin_id)
-            print(f"Found: {coin_name} -> {coin_id}")
-        else:
-            print(f"Could not find coin: {coin_name}")
+    new_coin_ids = action_profiler.profile("add_coins", resolve_coin_names, tracker, new_coin_names)
     
     if new_coin_ids:
-        updated_coins = list(set(current_coins + new_coin_ids))  # Remove duplicates
-        tracker.save_coins(updated_coins)
+        # Merge into the saved list as it is now, not the copy read before the prompt
+        updated_coins = tracker.add_coins(new_coin_ids)
         print(f"Added {len(new_coin_ids)} coins!")
         previous_selection()
-        return updated_coins
+        return updated_coins.to_list()
     else:
         print("No valid coins were added.")
         return current_coins
 
+@traced("cli.remove_coins")
 def remove_coins():
     """Remove coins from tracking list"""
     tracker = CryptoPriceTracker()
-    coin_ids = tracker.load_coins()
+    coin_ids = tracker.load_watchlist()
     
     if not coin_ids:
         print("No coins to remove.")
@@ -239,47 +2875,32 @@ def remove_coins():
     coins_to_remove_input = input("\nWhat coins would you like to remove? (Comma-separated names): ")
     coins_to_remove_names = [coin.strip().lower() for coin in coins_to_remove_input.split(",")]
     
-    coins_to_remove_ids = []
-    for coin_name in coins_to_remove_names:
-        # Try to find exact match or use name-to-id conversion
-        if coin_name in coin_ids:
-            coins_to_remove_ids.append(coin_name)
-        else:
-            coin_id = tracker.coin_name_to_id(coin_name)
-            if coin_id and coin_id in coin_ids:
-                coins_to_remove_ids.append(coin_id)
+    # Exact IDs need no lookup; resolve the rest in one batch
+    coins_to_remove_ids = Watchlist(coin_name for coin_name in coins_to_remove_names if coin_name in coin_ids)
+    unmatched_names = [coin_name for coin_name in coins_to_remove_names if coin_name not in coin_ids]
+    resolved_ids = action_profiler.profile("remove_coins",
+                                           lambda: tracker.resolved_ids(tracker.resolve_many(unmatched_names)))
+    coins_to_remove_ids.add(coin_id for coin_id in resolved_ids if coin_id in coin_ids)
     
     if coins_to_remove_ids:
-        updated_coins = [coin_id for coin_id in coin_ids if coin_id not in coins_to_remove_ids]
-        tracker.save_coins(updated_coins)
+        tracker.remove_coins(coins_to_remove_ids)
         print(f"Removed {len(coins_to_remove_ids)} coins!")
     else:
         print("No matching coins found to remove.")
 
+@traced("cli.top_coins")
 def top_coins(limit: int):
     """Display top coins by market cap"""
     tracker = CryptoPriceTracker()
     
-    print(f"\nFetching top {limit} cryptocurrencies...")
-    coins_data = tracker.api.get_top_coins(limit)
-    
-    if not coins_data:
-        print("Failed to fetch top coins data")
-        return
-    
-    print(f"\nTop {limit} Cryptocurrencies by Market Cap:")
-    tracker.display_coins_data(coins_data)
-    
     while True:
-        menu_or_refresh = input("\nMenu or Refresh? (m/r): ").lower()
-        if menu_or_refresh == 'r':
-            top_coins(limit)
-            break
-        elif menu_or_refresh == 'm':
+        if not action_profiler.profile("top_coins", show_top_coins, tracker, limit):
+            return
+        
+        if not ask_refresh():
             break
-        else:
-            print("Invalid choice. Please enter 'm' for Menu or 'r' for Refresh.")
 
+@traced("cli.user_coins")
 def user_coins():
     """Track user-specified coins"""
     tracker = CryptoPriceTracker()
@@ -287,43 +2908,146 @@ def user_coins():
     coins_input = input("\nWhat coins would you like to track? (Comma-separated names/symbols): ")
     coin_names = [coin.strip() for coin in coins_input.split(",")]
     
-    coin_ids = []
-    for coin_name in coin_names:
-        coin_id = tracker.coin_name_to_id(coin_name)
-        if coin_id:
-            coin_ids.append(coin_id)
-            print(f"Found: {coin_name} -> {coin_id}")
-        else:
-            print(f"Could not find coin: {coin_name}")
+    coin_ids = action_profiler.profile("user_coins", resolve_coin_names, tracker, coin_names)
     
     if not coin_ids:
         print("No valid coins found.")
         return
     
-    price_data = tracker.api.get_multiple_coin_prices(coin_ids)
-    if not price_data:
-        print("Failed to fetch price data")
-        return
+    while True:
+        if not action_profiler.profile("user_coins", show_prices, tracker, coin_ids):
+            return
+        
+        if not ask_refresh():
+            break
+
+def watch(interval: float = 30.0, limit: Optional[int] = None,
+          coin_names: Optional[List[str]] = None, iterations: Optional[int] = None,
+          api: Optional[CoinGeckoAPI] = None) -> None:
+    """Live-update prices in place until Ctrl+C, reusing one tracker and connection pool
     
-    print(f"\n{'Coin':<20} {'Price':<20}")
-    print("-" * 40)
+    Each refresh goes upstream (or to a live poller snapshot) rather than the response
+    caches, whose TTLs would otherwise replay the previous prices under a new timestamp.
+    """
+    tracker = CryptoPriceTracker(api=api or uncached_api(), snapshot=get_shared_snapshot_store())
+    coin_ids = []
+    if limit is None:
+        if coin_names:
+            coin_ids = tracker.resolved_ids(tracker.resolve_many(coin_names))
+        else:
+            coin_ids = tracker.load_coins()
+        if not coin_ids:
+            print("No coins to watch. Add coins first or pass --coins / --top.")
+            return
     
-    for coin_id in coin_ids:
-        formatted_price = tracker.format_price(price_data, coin_id)
-        print(f"{coin_id.title():<20} {formatted_price:<20}")
+    if limit is not None:
+        title = f"Top {limit} Cryptocurrencies by Market Cap"
+        header = [tracker.coins_header, "-" * 85]
+    else:
+        title = f"Watching {len(coin_ids)} coins"
+        header = [f"{'Coin':<20} {'Price':<20}", "-" * 40]
     
-    while True:
-        menu_or_refresh = input("\nMenu or Refresh? (m/r): ").lower()
-        if menu_or_refresh == 'r':
-            user_coins()
-            break
-        elif menu_or_refresh == 'm':
-            break
+    view = LiveView()
+    rows = []
+    refreshes = 0
+    try:
+        with view.capture():
+            while iterations is None or refreshes < iterations:
+                with tracer.span("cli.watch", refresh=refreshes + 1) as span:
+                    if limit is not None:
+                        new_rows = [tracker.format_coin_line(quote) for quote in tracker.iter_top_quotes(limit)]
+                    else:
+                        quotes = tracker.get_price_quotes(coin_ids)
+                        new_rows = ([tracker.format_price_line(quotes, coin_id) for coin_id in coin_ids]
+                                    if quotes else [])
+                    span.set(rows=len(new_rows))
+                    
+                    now = time.strftime("%H:%M:%S")
+                    if new_rows:
+                        rows = new_rows
+                        status = f"Updated {now} - refreshing every {interval:g}s (Ctrl+C to stop)"
+                    else:
+                        # Keep the last good rows on screen
+                        status = f"Update failed at {now}, retrying in {interval:g}s (Ctrl+C to stop)"
+                    with tracer.span("render.live", rows=len(rows)):
+                        view.render([title, ""] + header + rows + ["", status])
+                
+                refreshes += 1
+                if iterations is None or refreshes < iterations:
+                    time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+def main(argv: Optional[List[str]] = None):
+    """Parse options, then run the menu, --watch mode or the --poll daemon"""
+    parser = argparse.ArgumentParser(description="Crypto Price Tracker v2 - CoinGecko API")
+    parser.add_argument("--watch", action="store_true",
+                        help="live-update prices in place instead of showing the menu")
+    parser.add_argument("--poll", action="store_true",
+                        help="run the background poller that keeps the shared price snapshot fresh "
+                             "for every watchlist in use plus the top N")
+    parser.add_argument("--interval", type=float, default=30.0,
+                        help="seconds between refreshes in --watch and --poll mode (default: 30)")
+    parser.add_argument("--top", type=int, metavar="N",
+                        help="watch the top N coins instead of the saved selection "
+                             "(with --poll: top coins to publish, default 100)")
+    parser.add_argument("--coins", metavar="NAMES",
+                        help="comma-separated names/symbols to watch instead of the saved selection")
+    parser.add_argument("--watchlist", metavar="PATH",
+                        help="watchlist file to use (default: coins_v2.json; .db for SQLite)")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="shared price snapshot written by --poll and read by everything else "
+                             "(default: price_snapshot.db)")
+    parser.add_argument("--stats", action="store_true",
+                        help="print per-endpoint API statistics on exit")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="profile each menu action into DIR (default: profiles/)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record tracing spans to FILE (Chrome trace-event JSON; .jsonl for JSON lines)")
+    args = parser.parse_args(argv)
+    
+    if args.profile:
+        action_profiler.enable(args.profile)
+    if args.trace:
+        tracer.enable(args.trace)
+    
+    if args.watchlist:
+        use_watchlist(args.watchlist)
+    if args.snapshot:
+        use_snapshot(args.snapshot)
+    
+    poller = None
+    if args.poll:
+        poller = PricePoller(top=args.top if args.top is not None else 100, interval=max(args.interval, 5.0),
+                             watchlists=[get_shared_watchlist_store().path])
+    if poller is not None:
+        api = poller.api
+    elif args.watch:
+        api = uncached_api()
+    else:
+        api = get_shared_api()
+    
+    if args.metrics_port:
+        start_metrics_server(api, args.metrics_port)
+        print(f"Serving metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+    
+    try:
+        if poller is not None:
+            poller.run()
+        elif args.watch:
+            coin_names = [coin.strip() for coin in args.coins.split(",")] if args.coins else None
+            watch(max(args.interval, 1.0), args.top, coin_names, api=api)
         else:
-            print("Invalid choice. Please enter 'm' for Menu or 'r' for Refresh.")
+            menu()
+    finally:
+        if args.stats:
+            print("\nAPI statistics:")
+            print(format_stats(api.stats()))
 
-def main():
-    """Main menu loop"""
+def menu():
+    """Interactive menu loop"""
     print("Crypto Price Tracker v2 - CoinGecko API")
     print("=" * 40)
     
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'dashboard'))
+
+import Crypto_Prices_v2 as v2
+from CoinGecko_Emulator import CoinGeckoEmulator
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in its own directory, away from the user's watchlist, caches and snapshot"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(v2, "shared_snapshot_store", v2.PriceSnapshotStore(":memory:"))
+    monkeypatch.setattr(v2, "shared_watchlist_store", None)
+    return tmp_path
+
+
+@pytest.fixture
+def emulator():
+    with CoinGeckoEmulator(coins=600, seed=7) as emu:
+        yield emu
+
+
+def make_api(base_url, **overrides):
+    """A client with its own caches, breaker and rate budget, so tests don't share state"""
+    options = dict(base_url=base_url,
+                   rate_limiter=v2.RateLimiter(100000),
+                   cache=v2.ResponseCache(),
+                   disk_cache=v2.DiskCache(":memory:"),
+                   circuit_breaker=v2.CircuitBreaker(),
+                   single_flight=v2.SingleFlight(),
+                   backoff_base=0.01, backoff_max=0.05)
+    options.update(overrides)
+    return v2.CoinGeckoAPI(**options)
+
+
+@pytest.fixture
+def api(emulator):
+    client = make_api(emulator.base_url)
+    yield client
+    client.session.close()
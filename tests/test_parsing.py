@@ -0,0 +1,120 @@
+import json
+import random
+
+import pytest
+
+import Crypto_Prices_v2 as v2
+from conftest import make_api
+
+
+def split_randomly(data, seed):
+    rng = random.Random(seed)
+    chunks, pos = [], 0
+    while pos < len(data):
+        size = rng.randint(1, 7)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return chunks
+
+
+DOCUMENT = [1234567, -0.5e-3, True, False, None, "café – \"quoted\"", {"id": "bitcoin", "rank": 1},
+            [1, [2, 3]], 98765, "", 0]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_iter_json_array_survives_any_chunking(seed):
+    data = json.dumps(DOCUMENT).encode("utf-8")
+    assert list(v2.iter_json_array(split_randomly(data, seed))) == DOCUMENT
+
+
+def test_iter_json_array_does_not_cut_numbers_or_literals_at_chunk_edges():
+    assert list(v2.iter_json_array([b"[12", b"34, tr", b"ue, nu", b"ll]"])) == [1234, True, None]
+    # A number at the very end is complete only at EOF
+    assert list(v2.iter_json_array([b"[1", b"0", b"0]"])) == [100]
+
+
+@pytest.mark.parametrize("body", [b"[1, 2", b'[{"id": "bitcoin"', b'["unterminated', b"[1,", b""])
+def test_iter_json_array_rejects_truncated_input(body):
+    with pytest.raises(ValueError):
+        list(v2.iter_json_array([body]))
+
+
+def test_iter_json_array_rejects_non_arrays():
+    with pytest.raises(ValueError):
+        list(v2.iter_json_array([b'{"id": 1}']))
+
+
+def test_iter_json_array_handles_split_utf8():
+    data = json.dumps(["ééé"], ensure_ascii=False).encode("utf-8")
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert list(v2.iter_json_array(chunks)) == ["ééé"]
+
+
+def test_chunk_ids_respects_both_limits_and_drops_duplicates():
+    api = make_api("http://127.0.0.1:9")
+    api.max_ids_per_request = 3
+    api.max_ids_length = 20
+    ids = ["a", "b", "a", "c", "d", "long-coin-name-xx", "e"]
+    chunks = api.chunk_ids(ids)
+    assert [coin_id for chunk in chunks for coin_id in chunk] == ["a", "b", "c", "d", "long-coin-name-xx", "e"]
+    for chunk in chunks:
+        assert len(chunk) <= 3
+        assert len(",".join(chunk)) <= 20 or len(chunk) == 1
+
+
+def test_normalize_params_ignores_key_and_id_order():
+    assert (v2.normalize_params({"ids": "eth,btc", "include_24hr_change": True})
+            == v2.normalize_params({"include_24hr_change": "true", "ids": "btc, eth"}))
+
+
+def test_price_quotes_parse_from_the_emulator(api):
+    quotes = api.get_price_quotes(["bitcoin", "ethereum", "no-such-coin"])
+    assert set(quotes) == {"bitcoin", "ethereum"}
+    assert quotes["bitcoin"].price == 65000.0
+    assert quotes["bitcoin"].change_24h is not None
+
+
+def test_streamed_and_buffered_top_quotes_agree(api):
+    buffered = [(quote.id, quote.price) for quote in api.iter_top_quotes(300)]
+    streamed = [(quote.id, quote.price) for quote in api.iter_top_quotes(300, stream=True)]
+    assert len(buffered) == 300
+    assert streamed == buffered
+
+
+def test_caches_hold_quotes_not_payloads(emulator, workdir):
+    disk = v2.DiskCache(str(workdir / "cache.db"))
+    api = make_api(emulator.base_url, disk_cache=disk)
+    top = api.get_top_coins(5)
+    assert top[0]["id"] == "bitcoin" and top[0]["current_price"] == 65000.0
+    prices = api.get_multiple_coin_prices(["bitcoin", "ethereum"])
+    assert prices["bitcoin"]["usd"] == 65000.0
+
+    cached = [data for _, data in api.cache.entries.values()]
+    assert all(isinstance(quote, v2.CoinQuote)
+               for data in cached for quote in (data.values() if isinstance(data, dict) else data))
+
+    # A second process reads the same quotes back from disk
+    emulator.reset_stats()
+    other = make_api(emulator.base_url, disk_cache=v2.DiskCache(str(workdir / "cache.db")))
+    assert [quote.id for quote in other.iter_top_quotes(5)] == [coin["id"] for coin in top]
+    assert other.get_price_quotes(["ethereum", "bitcoin"])["bitcoin"].price == 65000.0
+    assert emulator.stats()["total_requests"] == 0
+
+
+def test_disk_entries_in_the_old_format_are_refetched(emulator):
+    api = make_api(emulator.base_url)
+    params = api._markets_params(1, 5, "usd")
+    api.disk_cache.set("/coins/markets", params, [{"id": "bitcoin", "current_price": 1}], ttl=60)
+    assert [quote.id for quote in api._get_markets_page(1, 5, "usd")][0] == "bitcoin"
+    assert emulator.stats()["requests"] == {"/coins/markets": 1}
+
+
+def test_connection_and_byte_counts_use_public_attributes(api):
+    for page in range(1, 4):
+        api._get_markets_page(page, 50, "usd")
+    assert "gzip" in api.session.headers["Accept-Encoding"]
+    stats = api.connection_stats()
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1 and stats["connections_reused"] == 2
+    assert stats["compressed_responses"] == 3
+    assert api.metrics.snapshot()["/coins/markets"]["bytes"] > 0
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import Crypto_Prices_v2 as v2
+from conftest import make_api
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_worker_started_inside_the_handler_is_profiled(workdir):
+    profiler = v2.ActionProfiler()
+    profiler.enable(str(workdir / "profiles"))
+    done = threading.Event()
+    sessions = []
+
+    def handler():
+        # What run_in_background does: hold the action, hand the work to a worker thread
+        session = profiler.current_session()
+        session.hold()
+        sessions.append(session)
+        work = session.wrap(lambda: busy(0.2), wait=1.0)
+        threading.Thread(target=lambda: (work(), session.release(), done.set())).start()
+        busy(0.05)  # the handler is still inside its own profile when the worker starts
+
+    profiler.profile("action", handler)
+    assert done.wait(5)
+    assert sessions[0].stats.total_tt >= 0.2
+
+
+def test_cli_profiles_each_refresh_without_the_prompt(emulator, monkeypatch, workdir):
+    api = make_api(emulator.base_url)
+    monkeypatch.setattr(v2, "get_shared_api", lambda: api)
+    monkeypatch.setattr(v2, "get_shared_async_api", lambda: v2.AsyncCoinGeckoAPI(api))
+    monkeypatch.setattr(v2, "action_profiler", v2.ActionProfiler())
+    v2.action_profiler.enable("profiles")
+    v2.get_shared_watchlist_store().save(["bitcoin"])
+    answers = iter(["r", "m"])
+
+    def slow_input(prompt):
+        time.sleep(0.3)
+        return next(answers)
+
+    monkeypatch.setattr("builtins.input", slow_input)
+    v2.previous_selection()
+    summaries = sorted(path.name for path in (workdir / "profiles").glob("*.txt"))
+    assert summaries == ["previous_selection-001.txt", "previous_selection-002.txt"]
+    for name in summaries:
+        wall = float((workdir / "profiles" / name).read_text().splitlines()[1].split()[2].rstrip("s,"))
+        assert wall < 0.3
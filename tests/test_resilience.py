@@ -0,0 +1,170 @@
+import bisect
+import json
+import threading
+import time
+
+import requests
+
+import Crypto_Prices_v2 as v2
+from conftest import make_api
+
+
+class FakeClock:
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_never_exceeds_budget_in_any_minute(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(v2.time, "monotonic", clock)
+    limiter = v2.RateLimiter(calls_per_minute=50)
+
+    starts = []
+    for _ in range(300):
+        clock.now += 0.2
+        starts.append(clock.now + limiter.reserve())
+    starts.sort()
+
+    busiest = max(bisect.bisect_left(starts, start + 60) - i for i, start in enumerate(starts))
+    assert busiest <= 50
+    # ...while still using the budget: the first 50 go out at once
+    assert starts[49] - starts[0] < 10
+
+
+def test_rate_limiter_available_counts_the_window(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(v2.time, "monotonic", clock)
+    limiter = v2.RateLimiter(calls_per_minute=10)
+    for _ in range(10):
+        assert limiter.reserve() == 0
+    clock.now += 30  # half a minute of refill, but the window is still full
+    assert limiter.available() == 0
+    clock.now += 31
+    assert limiter.available() == 10
+
+
+def test_single_flight_runs_concurrent_identical_calls_once():
+    flight = v2.SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while flight.stats()["coalesced"] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["result"] * 5
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_single_flight_shares_errors():
+    flight = v2.SingleFlight()
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    try:
+        flight.do("key", boom)
+    except RuntimeError as e:
+        assert str(e) == "upstream down"
+    else:
+        raise AssertionError("expected the error to propagate")
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_circuit_breaker_opens_then_half_opens(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(v2.time, "monotonic", clock)
+    breaker = v2.CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    for _ in range(2):
+        assert not breaker.record_failure("/x")
+    assert breaker.allow("/x")
+    assert breaker.record_failure("/x")
+    assert not breaker.allow("/x")
+
+    clock.now += 61
+    assert breaker.allow("/x")       # the single trial call
+    assert not breaker.allow("/x")   # everyone else still waits
+    assert breaker.record_failure("/x")  # a failed trial re-opens at once
+    assert not breaker.allow("/x")
+
+    clock.now += 61
+    assert breaker.allow("/x")
+    breaker.record_success("/x")
+    assert not breaker.is_open("/x")
+    assert breaker.allow("/x")
+
+
+def test_truncated_body_is_retried_and_counts_against_the_breaker(emulator):
+    api = make_api(emulator.base_url, max_retries=2,
+                   circuit_breaker=v2.CircuitBreaker(failure_threshold=1))
+    attempts = []
+
+    def truncated(*args, **kwargs):
+        attempts.append(1)
+        raise requests.exceptions.ChunkedEncodingError("connection broken mid-body")
+
+    api.session.get = truncated
+    assert api._request("/coins/markets") is None
+    assert len(attempts) == 3
+    assert api.circuit_breaker.is_open("/coins/markets")
+    assert api.metrics.snapshot()["/coins/markets"]["statuses"] == {"error": 3}
+
+
+def test_client_retries_injected_server_errors(emulator):
+    emulator.error_rate = 0.4
+    api = make_api(emulator.base_url, max_retries=10)
+    for page in range(1, 6):
+        assert len(api._get_markets_page(page, 20, "usd")) == 20
+    assert emulator.stats()["errors"] > 0
+    assert api.retry_stats()["retries"] == emulator.stats()["errors"]
+
+
+def test_trial_call_that_raises_reopens_the_breaker(emulator, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(v2.time, "monotonic", clock)
+    api = make_api(emulator.base_url, circuit_breaker=v2.CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    api.circuit_breaker.record_failure("/coins/markets")
+
+    def interrupted(body):
+        raise KeyboardInterrupt
+
+    clock.now += 61
+    api.json_decoder = interrupted
+    try:
+        api._request("/coins/markets", api._markets_params(1, 5, "usd"))
+    except KeyboardInterrupt:
+        pass
+    # The trial failed rather than leaving the endpoint half-open (and rejected) for good
+    assert not api.circuit_breaker.allow("/coins/markets")
+    clock.now += 61
+    api.json_decoder = v2.json_loads
+    assert api._request("/coins/markets", api._markets_params(1, 5, "usd")) is not None
+    assert not api.circuit_breaker.is_open("/coins/markets")
+
+
+def test_undecodable_body_counts_as_a_failure(emulator):
+    api = make_api(emulator.base_url, circuit_breaker=v2.CircuitBreaker(failure_threshold=1))
+    # What stdlib json.loads raises on non-UTF-8 bytes: a UnicodeDecodeError, not a JSONDecodeError
+    api.json_decoder = lambda body: json.loads(b"\xff\xfe" + body[:1] + b"\x00\xd8")
+    assert api._request("/coins/markets", api._markets_params(1, 5, "usd")) is None
+    assert api.circuit_breaker.is_open("/coins/markets")
@@ -0,0 +1,102 @@
+import Crypto_Prices_v2 as v2
+from conftest import make_api
+
+
+def poller_api(emulator):
+    uncached = v2.ResponseCache(ttls=dict.fromkeys(v2.ResponseCache.DEFAULT_TTLS, 0), default_ttl=0)
+    return make_api(emulator.base_url, cache=uncached)
+
+
+def test_default_poller_skips_the_response_caches():
+    poller = v2.PricePoller(snapshot=v2.PriceSnapshotStore(":memory:"), top=10)
+    assert poller.api.cache.ttl_for("/simple/price") == 0
+    assert poller.api.cache.ttl_for("/coins/markets") == 0
+    assert poller.api.disk_cache.path == ":memory:"
+
+
+def test_every_poll_reaches_upstream_and_publishes_fresh_prices(emulator, workdir):
+    v2.open_watchlist_store("a.json").save(["bitcoin", "coin-290"])
+    snapshot = v2.PriceSnapshotStore("snapshot.db")
+    poller = v2.PricePoller(api=poller_api(emulator), snapshot=snapshot, top=10,
+                            interval=30, watchlists=["a.json"])
+
+    poller.poll_once()
+    emulator.reset_stats()
+    emulator.tick(volatility=0.2)
+    poller.poll_once()
+    assert emulator.stats()["total_requests"] == 2  # markets page and one price chunk
+
+    quotes, missing = snapshot.quotes(["bitcoin", "coin-290"], emulator.base_url)
+    assert missing == []
+    assert quotes["coin-290"].price == emulator.by_id["coin-290"]["current_price"]
+    assert quotes["bitcoin"].price == emulator.by_id["bitcoin"]["current_price"]
+
+
+def test_store_sees_its_own_publish():
+    snapshot = v2.PriceSnapshotStore(":memory:")
+    assert snapshot.quotes(["bitcoin"], "http://upstream") == ({}, ["bitcoin"])
+    snapshot.publish("http://upstream", "usd", 30, {"bitcoin": {"usd": 1.5}},
+                     [{"id": "bitcoin", "current_price": 1.5}])
+    quotes, missing = snapshot.quotes(["bitcoin"], "http://upstream")
+    assert quotes["bitcoin"].price == 1.5 and missing == []
+    assert [quote.id for quote in snapshot.top_quotes(1, "http://upstream")] == ["bitcoin"]
+    # Another upstream never reads it
+    assert snapshot.quotes(["bitcoin"], "http://elsewhere")[0] == {}
+    snapshot.want_top(300, "http://upstream")
+    assert snapshot.demand()[2] == 300
+
+
+def test_stale_snapshot_falls_back_to_the_api(monkeypatch):
+    snapshot = v2.PriceSnapshotStore(":memory:")
+    snapshot.publish("http://upstream", "usd", 30, {"bitcoin": {"usd": 1.5}})
+    later = v2.time.time() + 2 * 30 + 11
+    monkeypatch.setattr(v2.time, "time", lambda: later)
+    assert snapshot.quotes(["bitcoin"], "http://upstream") == ({}, ["bitcoin"])
+    assert not snapshot.is_live("http://upstream")
+
+
+def test_frontends_read_the_snapshot_and_ask_for_missing_coins(emulator, workdir):
+    snapshot = v2.PriceSnapshotStore("snapshot.db")
+    store = v2.open_watchlist_store("front.json")
+    store.save(["bitcoin"])
+    poller = v2.PricePoller(api=poller_api(emulator), snapshot=snapshot, top=5, interval=30)
+    frontend_api = make_api(emulator.base_url)
+    tracker = v2.CryptoPriceTracker(api=frontend_api, store=store, snapshot=snapshot)
+
+    poller.poll_once()  # covers the registered watchlist
+    emulator.reset_stats()
+    assert set(tracker.get_price_quotes(["bitcoin"])) == {"bitcoin"}
+    assert len(list(tracker.iter_top_quotes(5))) == 5
+    assert emulator.stats()["total_requests"] == 0
+
+    # A coin nobody watches is fetched directly once, then the poller picks it up
+    assert "coin-400" in tracker.get_price_quotes(["bitcoin", "coin-400"])
+    assert emulator.stats()["requests"] == {"/simple/price": 1}
+    poller.poll_once()
+    assert snapshot.quotes(["coin-400"], emulator.base_url)[1] == []
+
+
+def test_private_api_gets_a_private_snapshot(emulator):
+    tracker = v2.CryptoPriceTracker(api=make_api(emulator.base_url),
+                                    store=v2.open_watchlist_store("private.json"))
+    assert tracker.snapshot is not v2.get_shared_snapshot_store()
+    assert tracker.snapshot.path == ":memory:"
+
+
+def test_frontends_leave_no_snapshot_behind_until_a_poller_runs(emulator, workdir):
+    snapshot = v2.PriceSnapshotStore("price_snapshot.db")
+    store = v2.open_watchlist_store("front.json")
+    store.save(["bitcoin"])
+    tracker = v2.CryptoPriceTracker(api=make_api(emulator.base_url), store=store, snapshot=snapshot)
+
+    assert set(tracker.get_price_quotes(["bitcoin"])) == {"bitcoin"}
+    assert len(list(tracker.iter_top_quotes(5))) == 5
+    assert not any(path.name.startswith("price_snapshot") for path in workdir.iterdir())
+
+    # The watchlist registered before the poller existed is still covered by it
+    poller = v2.PricePoller(api=poller_api(emulator), snapshot=v2.PriceSnapshotStore("price_snapshot.db"),
+                            top=5, interval=30)
+    poller.poll_once()
+    assert poller.demand()[0] == []  # not yet: the frontend had nowhere to record it
+    tracker.get_price_quotes(["bitcoin"])
+    assert "bitcoin" in poller.demand()[0]
@@ -0,0 +1,134 @@
+import json
+import threading
+
+import pytest
+
+import Crypto_Prices_v2 as v2
+
+
+def test_index_lookup_prefers_ranked_coins():
+    index = v2.CoinIndex(index_file=None)
+    index._index([["wrapped-bitcoin", "btc", "Wrapped Bitcoin"],
+                  ["bitcoin", "btc", "Bitcoin"],
+                  ["btc", "xyz", "Some Obscure Coin"],
+                  ["a-longer-id", "dup", "Duplicate"],
+                  ["short", "dup", "Duplicate Too"]],
+                 {"bitcoin": 1}, built_at=0.0)
+    # A ranked coin's symbol beats an unranked coin whose id is literally the query
+    assert index.lookup("BTC") == "bitcoin"
+    assert index.lookup(" Wrapped Bitcoin ") == "wrapped-bitcoin"
+    assert index.lookup("some obscure coin") == "btc"
+    # Unranked symbol collisions fall back to the shortest id
+    assert index.lookup("dup") == "short"
+    assert index.lookup("nothing") is None
+
+
+def test_index_builds_from_emulator_and_persists(api, workdir):
+    path = str(workdir / "index.json")
+    index = v2.CoinIndex(index_file=path)
+    assert index.build(api)
+    assert len(index) == 600
+    assert index.lookup("eth") == "ethereum"
+    assert index.ranks["bitcoin"] == 1
+
+    reloaded = v2.CoinIndex(index_file=path)
+    assert reloaded.load()
+    assert reloaded.lookup("sol") == "solana"
+    assert not reloaded.is_stale()
+
+
+def test_failed_index_rebuilds_back_off():
+    api = v2.CoinGeckoAPI(base_url="http://127.0.0.1:9", cache=v2.ResponseCache(),
+                          disk_cache=v2.DiskCache(":memory:"), circuit_breaker=v2.CircuitBreaker(),
+                          single_flight=v2.SingleFlight(), max_retries=0)
+    index = v2.CoinIndex(index_file=None)
+    attempts = []
+    index.build = lambda api: attempts.append(1) or False
+    for _ in range(5):
+        index.refresh_in_background(api)
+        index.rebuild_thread.join(5)
+    assert attempts == [1]
+
+
+@pytest.mark.parametrize("path", ["watchlist.json", "watchlist.db"])
+def test_store_keeps_order_and_applies_diffs(path):
+    store = v2.open_watchlist_store(path)
+    store.save(["bitcoin", "ethereum", "solana"])
+    assert store.add(["ethereum", "tether"]).to_list() == ["bitcoin", "ethereum", "solana", "tether"]
+    assert store.remove(["ethereum", "missing"]).to_list() == ["bitcoin", "solana", "tether"]
+    store.save(["tether", "bitcoin"])
+
+    # A second handle (another process, in effect) sees every change
+    other = v2.open_watchlist_store(path)
+    assert other.load() == ["tether", "bitcoin"]
+    other.add(["cardano"])
+    assert store.load() == ["tether", "bitcoin", "cardano"]
+
+
+@pytest.mark.parametrize("path", ["watchlist.json", "watchlist.db"])
+def test_concurrent_adds_are_never_lost(path):
+    v2.open_watchlist_store(path).save([])
+    errors = []
+
+    def writer(worker):
+        store = v2.open_watchlist_store(path)  # own handle, own cache
+        try:
+            for i in range(20):
+                store.add([f"coin-{worker}-{i}"])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert not errors
+    saved = v2.open_watchlist_store(path).load()
+    assert sorted(saved) == sorted(f"coin-{worker}-{i}" for worker in range(4) for i in range(20))
+
+
+def test_json_store_writes_are_atomic(workdir):
+    store = v2.JsonWatchlistStore("watchlist.json")
+    store.save(["bitcoin"])
+    store.add(["ethereum"])
+    # Only the finished file is ever in place: no temp files are left behind
+    leftovers = [name for name in workdir.iterdir() if name.name.startswith("watchlist.json") and
+                 name.name not in ("watchlist.json", "watchlist.json.lock")]
+    assert leftovers == []
+    with open("watchlist.json") as file:
+        assert json.load(file) == ["bitcoin", "ethereum"]
+
+
+def test_watchlist_store_is_abstract():
+    with pytest.raises(TypeError):
+        v2.WatchlistStore()
+
+
+def test_disk_cache_hits_do_not_write(workdir):
+    cache = v2.DiskCache(str(workdir / "cache.db"))
+    cache.set("/simple/price", {"ids": "bitcoin"}, {"bitcoin": {"usd": 1}}, ttl=60)
+    writes = cache.connection.total_changes
+    for _ in range(10):
+        assert cache.get("/simple/price", {"ids": "bitcoin"})[0] == {"bitcoin": {"usd": 1}}
+    assert cache.connection.total_changes == writes
+    # The hit times still reach disk with the next write, for the LRU eviction order
+    cache.set("/simple/price", {"ids": "ethereum"}, {}, ttl=60)
+    fetched_at, last_access = cache.connection.execute(
+        "SELECT fetched_at, last_access FROM responses WHERE key LIKE '%bitcoin%'").fetchone()
+    assert last_access > fetched_at
+
+
+def test_disk_cache_compacts_in_the_background_and_quietly(workdir, capsys):
+    path = str(workdir / "cache.db")
+    cache = v2.DiskCache(path, max_entries=5, compact_every=10)
+    reader = v2.sqlite3.connect(path)
+    for i in range(10):
+        cache.set("/simple/price", {"ids": f"coin-{i}"}, {"i": i}, ttl=60)
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM responses").fetchone()  # a reader that blocks VACUUM
+    cache.compaction_thread.join(10)
+    reader.rollback()
+    assert cache.stats()["entries"] == 5
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,91 @@
+import io
+import threading
+
+import pytest
+
+import Crypto_Prices_v2 as v2
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_live_view_rewrites_only_changed_lines():
+    terminal = Terminal()
+    view = v2.LiveView(terminal)
+    assert view.render(["a", "b", "c"]) == 3
+    assert view.render(["a", "B", "c"]) == 1
+    assert view.render(["a", "B", "c"]) == 0
+
+
+def test_live_view_redraws_below_other_output():
+    terminal = Terminal()
+    view = v2.LiveView(terminal)
+    with view.capture():
+        view.render(["a", "b"])
+        print("Error: upstream timed out")
+        before = terminal.tell()
+        assert view.render(["a", "b"]) == 2
+    # A fresh block under the error, without moving the cursor up into it
+    assert "\x1b[" not in terminal.getvalue()[before:].replace("\x1b[J", "")
+    assert view.render(["a", "b"]) == 0
+
+
+class FakeWindow:
+    def __init__(self):
+        self.timers = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.timers[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, timer):
+        del self.timers[timer]
+
+
+@pytest.fixture
+def refresher():
+    interface = pytest.importorskip("Crypto_Prices_Interface_v2")
+    return interface.AutoRefresher(FakeWindow(), v2.RateLimiter(50))
+
+
+def test_auto_refresh_cancel_forgets_the_view(refresher):
+    refresher.schedule(("watchlist",), lambda: None)
+    refresher.cancel()
+    assert refresher.view is None and refresher.refresh is None
+    # Toggling auto-refresh must not bring back the view that was cancelled
+    refresher.set_enabled(False)
+    refresher.set_enabled(True)
+    assert refresher.window.timers == {}
+
+
+def test_auto_refresh_toggle_rearms_the_current_view(refresher):
+    refreshed = []
+    refresher.schedule(("watchlist",), lambda: refreshed.append(1))
+    refresher.set_enabled(False)
+    assert refresher.window.timers == {}
+    refresher.set_enabled(True)
+    [tick] = refresher.window.timers.values()
+    tick()
+    assert refreshed == [1]
+
+
+def test_watch_shows_fresh_prices_on_every_refresh(emulator, monkeypatch, capsys):
+    monkeypatch.setenv("COINGECKO_BASE_URL", emulator.base_url)
+    real_sleep = v2.time.sleep
+
+    def sleep(seconds):
+        # The watch loop's wait is where prices move; background threads sleep for real
+        if threading.current_thread() is threading.main_thread():
+            emulator.tick(volatility=0.2)
+        else:
+            real_sleep(seconds)
+
+    monkeypatch.setattr(v2.time, "sleep", sleep)
+    v2.watch(interval=1, limit=5, iterations=3)
+    assert emulator.stats()["requests"]["/coins/markets"] >= 3  # plus the coin index ranks
+    blocks = capsys.readouterr().out.split("Top 5 Cryptocurrencies")[1:]
+    assert len(blocks) == 3 and len(set(blocks)) == 3